@@ -18,3 +18,12 @@ class GARTHTestCase(unittest.TestCase):
 
     def test_step(self):
         self.g.step()
+
+    def test_step_batch(self):
+        g = GARTH(self.problem, batch=True)
+        g.step()
+
+    def test_step_processes(self):
+        g = GARTH(self.problem, processes=2)
+        g.step()
+        g.close()
@@ -1,10 +1,23 @@
 import unittest
 import nose
 import os.path
+import json
+import shutil
+import tempfile
 
 import numpy as np
-from ukko import RCPParser, Problem,  ActivityList, Schedule, SSGS, RTHypothesis, RTSystem, GARTH, ResourceUtilization
+from ukko import RCPParser, Problem,  ActivityList, Schedule, LazySchedule, SSGS, FastSSGS, PSGS, BatchSSGS, RTHypothesis, RTSystem, GARTH, IslandGARTH, ResourceUtilization
 from ukko.utils import PrecedenceException
+from ukko.activity_list import generate_population, crossover_population, shift_population, priority_weights
+from ukko.evaluator import PoolEvaluator, _share, _view, _init_worker, _worker
+from ukko.cache import FitnessCache
+from ukko.benchmark import run_benchmark
+from ukko.instance_store import compile_store, InstanceStore
+from ukko.batch import instance_paths, instance_size, run_batch, ResultStore
+from ukko.worker import ProblemCache, chunks, solve_runs, write_runs, write_best
+from ukko.stats import Stats
+from ukko.garth import solve
+from ukko.justification import Justification
 
 PROJECT_ROOT = os.path.join(os.path.dirname(__file__), '../')
 TEST_FILE = PROJECT_ROOT + 'psplib/j30rcp/J301_1.RCP'
@@ -46,6 +59,48 @@ class ProblemTestCase(unittest.TestCase):
         self.assertSetEqual(set(range(31)), self.problem.predecessors_all(31))
         self.assertSetEqual({0, 2, 3, 7, 8, 11}, self.problem.predecessors_all(13))
 
+    def test_lower_bound(self):
+        self.assertEqual(self.problem.critical_path_length(), 38)
+        self.assertEqual(self.problem.resource_lower_bound(), 25)
+        self.assertEqual(self.problem.disjunctive_lower_bound(), 27)
+        self.assertEqual(self.problem.lower_bound, 38)
+
+    def test_time_windows(self):
+        self.assertEqual(self.problem.earliest_starts[0], 0)
+        self.assertEqual(self.problem.tails[0], 38)
+        latest_starts = self.problem.latest_starts(38)
+        self.assertEqual(latest_starts[31], 38)
+        for activity1, activity2 in self.problem.edges:
+            self.assertLessEqual(self.problem.earliest_starts[activity1] + self.problem.durations[activity1],
+                                 self.problem.earliest_starts[activity2])
+            self.assertLessEqual(latest_starts[activity1] + self.problem.durations[activity1], latest_starts[activity2])
+
+    def test_closure(self):
+        self.assertTrue(self.problem.closure[0, 31])
+        self.assertTrue(self.problem.closure[3, 13])
+        self.assertFalse(self.problem.closure[13, 3])
+        self.assertFalse(self.problem.closure[1, 2])
+        for activity in xrange(self.problem.num_activities):
+            self.assertSetEqual(self.problem.predecessors(activity),
+                                set(self.problem.predecessor_arrays[activity].tolist()))
+
+    def test_compiled(self):
+        self.assertIsNone(self.problem._graph)
+        for activity in xrange(self.problem.num_activities):
+            indptr, indices = self.problem.successor_indptr, self.problem.successor_indices
+            self.assertSetEqual(self.problem.successors(activity),
+                                set(indices[indptr[activity]:indptr[activity + 1]].tolist()))
+            self.assertEqual(self.problem.duration(activity), self.problem_dict['activities']['duration'][activity])
+        self.assertFalse(self.problem.durations.flags.writeable)
+
+    def test_contains_all_predecessors_mask(self):
+        mask = np.zeros(self.problem.num_activities, dtype=bool)
+        self.assertTrue(self.problem.contains_all_predecessors_mask(mask, 0))
+        self.assertFalse(self.problem.contains_all_predecessors_mask(mask, 1))
+        mask[0] = True
+        np.testing.assert_array_equal(self.problem.contains_all_predecessors_mask(mask, [1, 2, 3, 5]),
+                                      [True, True, True, False])
+
 
 class ActivityListTestCase(unittest.TestCase):
     def setUp(self):
@@ -80,6 +135,17 @@ class ActivityListTestCase(unittest.TestCase):
         self.assertFalse(np.all(al._array == al2._array))
         self.assertTrue(al.is_precedence_feasible())
 
+    def test_generate_population(self):
+        population = generate_population(self.problem, 20)
+        self.assertEqual(population.shape, (20, self.problem.num_activities))
+        for array in population:
+            self.assertListEqual(sorted(array), range(self.problem.num_activities))
+            self.assertTrue(ActivityList(self.problem, array).is_precedence_feasible())
+        weights = priority_weights(self.problem, 'mts')
+        for array in generate_population(self.problem, 5, weights):
+            self.assertTrue(ActivityList(self.problem, array).is_precedence_feasible())
+        self.assertRaises(ValueError, priority_weights, self.problem, 'unknown')
+
     def test_shift(self):
         self.assertEqual(0, self.al.shift(0, ActivityList.RIGHT_SHIFT, 1))
         self.assertEqual(2, self.al.shift(1, ActivityList.RIGHT_SHIFT, 2))  # normal swap
@@ -88,10 +154,33 @@ class ActivityListTestCase(unittest.TestCase):
         self.assertEqual(5, self.al.shift(2, ActivityList.LEFT_SHIFT, 5))
         self.assertEqual(0, self.al.shift(31, ActivityList.LEFT_SHIFT, 31))
 
+    def test_shift_population(self):
+        population = generate_population(self.problem, 10)
+        activities = [2, 13, 7, 31]
+        directions = np.random.choice((ActivityList.LEFT_SHIFT, ActivityList.RIGHT_SHIFT), (10, len(activities)))
+        shifted = shift_population(self.problem, population, activities, directions, 6)
+        for k in xrange(10):
+            al = ActivityList(self.problem, population[k])
+            for j, activity in enumerate(activities):
+                al.shift(activity, directions[k, j], 6)
+            np.testing.assert_array_equal(shifted[k], al._array)
+            self.assertTrue(ActivityList(self.problem, shifted[k]).is_precedence_feasible())
+
     def test_crossover(self):
         child = self.al.crossover(self.al_better, 10, 20)
         self.assertTrue(child.is_precedence_feasible())
 
+    def test_crossover_population(self):
+        population = np.vstack((generate_population(self.problem, 8), [self.activities_order_better]))
+        parents = np.array([[8, 0], [0, 8], [3, 4], [5, 5], [1, 2], [2, 1]])
+        c1 = np.array([10, 0, 31, 7, 0, 4])
+        c2 = np.array([20, 31, 31, 7, 0, 30])
+        children = crossover_population(population, parents, c1, c2)
+        for k, child in enumerate(children):
+            mother = ActivityList(self.problem, population[parents[k, 0]])
+            father = ActivityList(self.problem, population[parents[k, 1]])
+            np.testing.assert_array_equal(child, mother.crossover(father, c1[k], c2[k])._array)
+
 
 class ScheduleTestCase(unittest.TestCase):
     def setUp(self):
@@ -161,6 +250,17 @@ class ScheduleTestCase(unittest.TestCase):
         self.assertEqual(len(self.schedule.scheduled_activities), self.problem.num_activities)
         self.assertGreaterEqual(initial_makespan, self.schedule.makespan)  # makespan should be same or better
 
+    def test_lazy_schedule(self):
+        schedule = SSGS(self.problem).get_schedule(self.al)
+        start_times = [schedule.start_times_activities[activity] for activity in xrange(self.problem.num_activities)]
+        lazy = LazySchedule(self.problem, self.al._array, start_times)
+        self.assertEqual(lazy.makespan, schedule.makespan)
+        self.assertIsNone(lazy._schedule)
+        np.testing.assert_array_equal(lazy.serialize()._array, schedule.serialize()._array)
+        self.assertIsNone(lazy._schedule)
+        self.assertEqual(str(lazy), str(schedule))
+        self.assertEqual(lazy.finish_times_activities, schedule.finish_times_activities)
+
     def test_serialize(self):
         ssgs = SSGS(self.problem)
         self.schedule = ssgs.get_schedule(self.al)
@@ -209,6 +309,30 @@ class ResourceUtilizationTestCase(unittest.TestCase):
         self.ru.add(res_constraints, 0, 5)
         self.assertFalse(self.ru.is_free(np.array([1, 1, 1, 1], ndmin=2).T, 4, 6))
 
+    def test_earliest_start(self):
+        demands = np.array([[4, 0, 0, 0]]).T
+        self.ru.add(np.array([[10, 0, 0, 0]]).T, 2, 5)
+        self.assertEqual(self.ru.earliest_start(demands, 0, 2), 0)
+        self.assertEqual(self.ru.earliest_start(demands, 0, 3), 5)
+        self.assertEqual(self.ru.earliest_start(demands, 20, 3), 20)
+        self.assertIsNone(self.ru.earliest_start(np.array([[13, 0, 0, 0]]).T, 0, 1))
+        self.assertIsNone(self.ru.earliest_start(demands, 1, 3, 4))
+
+    def test_latest_start(self):
+        demands = np.array([[4, 0, 0, 0]]).T
+        self.ru.add(np.array([[10, 0, 0, 0]]).T, 2, 5)
+        self.assertEqual(self.ru.latest_start(demands, 10, 3), 10)
+        self.assertEqual(self.ru.latest_start(demands, 4, 2), 0)
+        self.assertEqual(self.ru.latest_start(demands, 20, 3), 20)
+        self.assertIsNone(self.ru.latest_start(demands, 4, 2, 1))
+
+    def test_empty_window(self):
+        demands = np.array([[4, 0, 0, 0]]).T
+        far = self.ru.utilization.shape[1] + 10
+        self.assertIsNone(self.ru.earliest_start(demands, far + 5, 3, far))
+        self.assertIsNone(self.ru.latest_start(demands, far, 3, far + 5))
+        self.assertIsNone(self.ru.latest_start(demands, 4, 3, 6))
+
 
 class SSGSTestCase(unittest.TestCase):
     def setUp(self):
@@ -225,6 +349,106 @@ class SSGSTestCase(unittest.TestCase):
         self.assertEqual(len(schedule.scheduled_activities), self.problem.num_activities)
 
 
+class FastSSGSTestCase(unittest.TestCase):
+    def setUp(self):
+        parser = RCPParser()
+        self.problem_dict = parser(TEST_FILE)
+        self.problem = Problem(self.problem_dict)
+        self.ssgs = SSGS(self.problem)
+        self.fast_ssgs = FastSSGS(self.problem)
+
+    def test_decode(self):
+        for i in xrange(10):
+            al = ActivityList(self.problem).generate_random()
+            schedule = self.ssgs.get_schedule(al)
+            start_times, makespan = self.fast_ssgs.decode(al)
+            self.assertEqual(makespan, schedule.makespan)
+            for activity in xrange(self.problem.num_activities):
+                self.assertEqual(start_times[activity], schedule.start_times_activities[activity])
+
+    def test_decode_bound(self):
+        for i in xrange(10):
+            al = ActivityList(self.problem).generate_random()
+            start_times, makespan = self.fast_ssgs.decode(al)
+            self.assertEqual(self.fast_ssgs.decode(al, makespan + 1)[1], makespan)
+            self.assertIsNone(self.fast_ssgs.decode(al, makespan)[1])
+            self.assertIsNone(self.fast_ssgs.decode(al, self.problem.critical_path_length())[1])
+
+    def test_get_schedule(self):
+        al = ActivityList(self.problem).generate_random()
+        schedule = self.ssgs.get_schedule(al)
+        fast_schedule = self.fast_ssgs.get_schedule(al)
+        self.assertEqual(str(schedule), str(fast_schedule))
+        self.assertEqual(schedule.makespan, fast_schedule.makespan)
+
+    def test_build_schedule_reuse(self):
+        reused = None
+        for i in xrange(5):
+            al = ActivityList(self.problem).generate_random()
+            start_times, makespan = self.fast_ssgs.decode(al)
+            schedule = self.fast_ssgs.build_schedule(al, start_times)
+            reused = self.fast_ssgs.build_schedule(al, start_times, reused)
+            self.assertEqual(str(schedule), str(reused))
+            self.assertEqual(reused.makespan, makespan)
+
+
+class PSGSTestCase(unittest.TestCase):
+    def setUp(self):
+        parser = RCPParser()
+        self.problem_dict = parser(TEST_FILE)
+        self.problem = Problem(self.problem_dict)
+        self.psgs = PSGS(self.problem)
+
+    def test_decode(self):
+        for i in xrange(10):
+            al = ActivityList(self.problem).generate_random()
+            start_times, makespan = self.psgs.decode(al)
+            finish_times = start_times + self.problem.durations
+            self.assertEqual(makespan, finish_times.max())
+            for activity1, activity2 in self.problem.edges:
+                self.assertLessEqual(finish_times[activity1], start_times[activity2])
+            for t in xrange(makespan):
+                running = (start_times <= t) & (t < finish_times)
+                self.assertTrue(np.all(self.problem.res_demands[:, running].sum(axis=1) <=
+                                       self.problem.res_constraints[:, 0]))
+
+    def test_decode_bound(self):
+        al = ActivityList(self.problem).generate_random()
+        start_times, makespan = self.psgs.decode(al)
+        self.assertEqual(self.psgs.decode(al, makespan + 1)[1], makespan)
+        self.assertIsNone(self.psgs.decode(al, makespan)[1])
+
+    def test_non_delay(self):
+        # activity is never delayed while its predecessors are finished and resources free
+        al = ActivityList(self.problem).generate_random()
+        start_times, makespan = self.psgs.decode(al)
+        schedule = self.psgs.build_schedule(al, start_times)
+        self.assertEqual(schedule.makespan, makespan)
+        for activity in xrange(self.problem.num_activities):
+            if start_times[activity] > 0:
+                schedule.remove(activity)
+                self.assertFalse(schedule.can_place(activity, start_times[activity] - 1))
+                schedule.add(activity, start_times[activity], force=True)
+
+
+class BatchSSGSTestCase(unittest.TestCase):
+    def setUp(self):
+        parser = RCPParser()
+        self.problem_dict = parser(TEST_FILE)
+        self.problem = Problem(self.problem_dict)
+        self.fast_ssgs = FastSSGS(self.problem)
+        self.batch_ssgs = BatchSSGS(self.problem)
+
+    def test_decode(self):
+        population = [ActivityList(self.problem).generate_random() for i in xrange(20)]
+        start_times, makespans = self.batch_ssgs.decode([al._array for al in population])
+        self.assertEqual(start_times.shape, (20, self.problem.num_activities))
+        for index, al in enumerate(population):
+            al_start_times, makespan = self.fast_ssgs.decode(al)
+            self.assertEqual(makespans[index], makespan)
+            np.testing.assert_array_equal(start_times[index], al_start_times)
+
+
 class RTHypothesisTestCase(unittest.TestCase):
     def setUp(self):
         parser = RCPParser()
@@ -271,12 +495,47 @@ class RTHypothesisTestCase(unittest.TestCase):
         self.assertLess(self.schedule_better.makespan, self.schedule.makespan)
         self.assertEqual(rt[1, 8], self.schedule_better.makespan)
 
+    def test_update_batch(self):
+        ssgs = FastSSGS(self.problem)
+        orders = []
+        start_times = []
+        makespans = []
+        for al in (self.al, self.al_better):
+            al_start_times, makespan = ssgs.decode(al)
+            start_times.append(al_start_times)
+            makespans.append(makespan)
+            orders.append(np.argsort(al._array))
+        start_times = np.array(start_times)
+        finish_times = start_times + self.problem.durations
+        for characteristic in (RTHypothesis.PSE, RTHypothesis.FLE, RTHypothesis.SLT):
+            rt = RTHypothesis(self.problem, characteristic)
+            rt.update(self.schedule)
+            rt.update(self.schedule_better)
+            rt_batch = RTHypothesis(self.problem, characteristic)
+            rt_batch.update_batch(start_times, finish_times, makespans, orders)
+            np.testing.assert_array_equal(rt._array, rt_batch._array)
+
     def test_excluding(self):
         rt = RTHypothesis(self.problem, RTHypothesis.PSE)
         rt.update(self.schedule)
         rt.update(self.schedule_better)
         self.assertIn((0, 1), rt.get_excluding())
 
+    def test_excluding_incremental(self):
+        ssgs = FastSSGS(self.problem)
+        rt = RTHypothesis(self.problem, RTHypothesis.FLE)
+        for i in xrange(20):
+            al = ActivityList(self.problem).generate_random()
+            start_times, makespan = ssgs.decode(al)
+            rt.update_batch(start_times[np.newaxis], (start_times + self.problem.durations)[np.newaxis],
+                            [makespan], np.argsort(al._array)[np.newaxis])
+            if i % 5 == 4:
+                array = rt._array.copy()
+                array[np.random.random(array.shape) < 0.3] -= 1
+                rt.merge(array)
+            max_time = rt._array[rt._array < RTHypothesis.INFINITY].max()
+            self.assertEqual(rt.get_excluding(), [tuple(cell) for cell in np.argwhere(rt._array == max_time)])
+
 
 class RTSystemTestCase(unittest.TestCase):
 
@@ -301,17 +560,465 @@ class RTSystemTestCase(unittest.TestCase):
         self.assertGreater(len(rt.get_excluding_activities()), 0)
 
 
-# class GARTHTestCase(unittest.TestCase):
-#     def setUp(self):
-#         parser = RCPParser()
-#         self.problem_dict = parser(TEST_FILE)
-#         self.problem = Problem(self.problem_dict)
-#
-#     def test_step(self):
-#         g = GARTH(self.problem)
-#         g.step()
-#
-#     def test_run(self):
-#         g = GARTH(self.problem)
-#         g.run()
+class PoolEvaluatorTestCase(unittest.TestCase):
+    def setUp(self):
+        parser = RCPParser()
+        self.problem_dict = parser(TEST_FILE)
+        self.problem = Problem(self.problem_dict)
+        self.evaluator = PoolEvaluator(self.problem, processes=2, chunk_size=3, justify=False)
+
+    def tearDown(self):
+        self.evaluator.close()
+
+    def test_evaluate(self):
+        ssgs = FastSSGS(self.problem)
+        population = [ActivityList(self.problem).generate_random() for i in xrange(7)]
+        start_times, makespans, shifted_start_times, shifted_makespans, serialized = \
+            self.evaluator.evaluate([al._array for al in population])
+        for index, al in enumerate(population):
+            schedule = ssgs.get_schedule(al)
+            self.assertEqual(makespans[index], schedule.makespan)
+            schedule.right_shift()
+            self.assertEqual(shifted_makespans[index], schedule.makespan)
+            np.testing.assert_array_equal(serialized[index], schedule.serialize()._array)
+
+    def test_shared_problem(self):
+        shared = {'duration': _share(self.problem.durations),
+                  'res_demands': _share(self.problem.res_demands),
+                  'res_constraints': _share(self.problem.res_constraints),
+                  'edges': _share(self.problem.edges),
+                  'closure': _share(self.problem.closure)}
+        _init_worker(self.problem.num_activities, self.problem.num_resources, shared, False)
+        problem = _worker['problem']
+        for key, array in (('duration', problem.durations), ('res_demands', problem.res_demands),
+                           ('edges', problem.edges), ('closure', problem.closure)):
+            self.assertTrue(np.may_share_memory(array, _view(*shared[key])))
+        _worker.clear()
+
+
+class JustificationTestCase(unittest.TestCase):
+    def setUp(self):
+        parser = RCPParser()
+        self.problem_dict = parser(TEST_FILE)
+        self.problem = Problem(self.problem_dict)
+        self.ssgs = FastSSGS(self.problem)
+        self.justification = Justification(self.problem)
+
+    def assertFeasible(self, start_times):
+        finish_times = start_times + self.problem.durations
+        for activity1, activity2 in self.problem.edges:
+            self.assertLessEqual(finish_times[activity1], start_times[activity2])
+        ru = ResourceUtilization(self.problem.res_constraints, self.problem.num_resources, finish_times.max())
+        for activity in xrange(self.problem.num_activities):
+            self.assertTrue(ru.is_free(self.problem.demands(activity), start_times[activity], finish_times[activity]))
+            ru.add(self.problem.demands(activity), start_times[activity], finish_times[activity])
+
+    def test_justify(self):
+        for i in xrange(10):
+            al = ActivityList(self.problem).generate_random()
+            start_times, makespan = self.ssgs.decode(al)
+            right_start_times, right_makespan = self.justification.right_justify(start_times)
+            self.assertFeasible(right_start_times)
+            self.assertEqual(right_makespan, makespan)
+            self.assertTrue(np.all(right_start_times >= start_times))
+            justified_start_times, justified_makespan, order = self.justification.justify(start_times)
+            self.assertFeasible(justified_start_times)
+            self.assertLessEqual(justified_makespan, makespan)
+            self.assertEqual(justified_makespan, (justified_start_times + self.problem.durations).max())
+            self.assertTrue(ActivityList(self.problem, order).is_precedence_feasible())
+            self.assertLessEqual(self.ssgs.decode(order)[1], justified_makespan)
+
+    def test_capacity_buffer(self):
+        capacity = self.justification._capacity
+        rows = list(capacity)
+        for i in xrange(3):
+            al = ActivityList(self.problem).generate_random()
+            self.justification.justify(self.ssgs.decode(al)[0])
+        self.assertIs(self.justification._capacity, capacity)
+        self.assertTrue(all(row is original for row, original in zip(capacity, rows)))
+
+
+class FitnessCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        parser = RCPParser()
+        self.problem_dict = parser(TEST_FILE)
+        self.problem = Problem(self.problem_dict)
+
+    def test_lru(self):
+        cache = FitnessCache(2)
+        a, b, c = np.array([0, 1, 2]), np.array([0, 2, 1]), np.array([1, 0, 2])
+        cache.put(a, 'a')
+        cache.put(b, 'b')
+        self.assertEqual(cache.get(a), 'a')
+        cache.put(c, 'c')
+        self.assertIsNone(cache.get(b))
+        self.assertEqual(cache.get(a), 'a')
+        self.assertEqual(len(cache), 2)
+        self.assertEqual((cache.hits, cache.misses), (2, 1))
+
+    def test_lookup(self):
+        cache = FitnessCache(10)
+        a, b = np.array([0, 1, 2]), np.array([0, 2, 1])
+        cache.put(a, 'a')
+        values, missing = cache.lookup(np.array([a, b, b]))
+        self.assertEqual(values, ['a', None, None])
+        self.assertEqual(missing, [[1, 2]])
+
+    def test_variants(self):
+        cache = FitnessCache(10)
+        a = np.array([0, 1, 2])
+        cache.put(a, 'serial', False)
+        self.assertIsNone(cache.get(a, True))
+        cache.put(a, 'parallel', True)
+        self.assertEqual(cache.get(a, False), 'serial')
+        values, missing = cache.lookup(np.array([a, a, a]), np.array([True, False, True]))
+        self.assertEqual(values, ['parallel', 'serial', 'parallel'])
+        self.assertEqual(missing, [])
+
+    def test_garth(self):
+        g = GARTH(self.problem, popSize=20, cache_size=100)
+        population = generate_population(self.problem, 20)
+        g.population[:] = population
+        g._evaluate(g._rows)
+        results = g.population.copy(), g.start_times.copy(), g.makespans.copy()
+        generated_schedules = g.generated_schedules
+        hits = g.cache.hits
+        g.population[:] = population
+        g._evaluate(g._rows)
+        self.assertEqual(g.generated_schedules, generated_schedules)
+        self.assertEqual(g.cache.hits, hits + 20)
+        for part, cached_part in zip(results, (g.population, g.start_times, g.makespans)):
+            np.testing.assert_array_equal(part, cached_part)
+
+    def test_serialized(self):
+        # population holds serialized lists, copying them to the next generation costs no schedules
+        for justification in ('double', 'right_shift'):
+            g = GARTH(self.problem, popSize=20, cache_size=100, justification=justification)
+            generated_schedules = g.generated_schedules
+            g._evaluate(g._rows)
+            self.assertEqual(g.generated_schedules, generated_schedules)
+
+
+class IslandGARTHTestCase(unittest.TestCase):
+    def setUp(self):
+        parser = RCPParser()
+        self.problem_dict = parser(TEST_FILE)
+        self.problem = Problem(self.problem_dict)
+
+    def test_run(self):
+        g = IslandGARTH(self.problem, islands=2, popSize=10, migration_interval=2, schedule_limit=200, seed=1)
+        g.run()
+        self.assertGreaterEqual(g.generated_schedules, 200)
+        self.assertEqual(g.best.makespan, g.best_makespan)
+        self.assertEqual(len(g.best.scheduled_activities), self.problem.num_activities)
+        self.assertTrue(g.best.serialize().is_precedence_feasible())
+
+    def test_stopping(self):
+        g = IslandGARTH(self.problem, islands=2, popSize=10, migration_interval=2, schedule_limit=10000, seed=1,
+                        target_makespan=1000)
+        g.run()
+        self.assertEqual(g.stop_reason, 'target_makespan')
+        self.assertLess(g.generated_schedules, 10000)
+        g = IslandGARTH(self.problem, islands=2, popSize=10, migration_interval=2, schedule_limit=10000, seed=1,
+                        time_limit=0)
+        g.run()
+        self.assertEqual(g.stop_reason, 'time_limit')
+
+    def test_lower_bound_stop(self):
+        problem = Problem(RCPParser()(PROJECT_ROOT + 'psplib/j30rcp/J3012_1.RCP'))
+        g = IslandGARTH(problem, islands=2, popSize=10, migration_interval=2, schedule_limit=5000, seed=1)
+        g.run()
+        self.assertEqual(g.stop_reason, 'lower_bound')
+        self.assertLess(g.generated_schedules, 5000)
+        self.assertEqual(g.best_makespan, problem.lower_bound)
+
+
+class GARTHTestCase(unittest.TestCase):
+    def setUp(self):
+        parser = RCPParser()
+        self.problem_dict = parser(TEST_FILE)
+        self.problem = Problem(self.problem_dict)
+
+    def test_step(self):
+        g = GARTH(self.problem, popSize=20)
+        g.step()
+
+    def test_run(self):
+        g = GARTH(self.problem, popSize=20, schedule_limit=200)
+        g.run()
+        self.assertGreaterEqual(g.generated_schedules, 200)
+        self.assertGreaterEqual(g.best.makespan, self.problem.critical_path_length())
+
+    def test_sgs(self):
+        for sgs in ('parallel', 'mixed'):
+            g = GARTH(self.problem, popSize=20, sgs=sgs)
+            g.step()
+            self.assertEqual(g.best.makespan, g.makespans[g.indices[0]])
+
+    def test_iterate(self):
+        g = GARTH(self.problem, popSize=10, schedule_limit=100)
+        progress = list(g.iterate())
+        self.assertEqual(progress[0]['generation'], 0)
+        self.assertEqual(progress[-1]['generated_schedules'], g.generated_schedules)
+        self.assertEqual(progress[-1]['best_makespan'], g.best.makespan)
+        self.assertEqual(g.stop_reason, 'schedule_limit')
+        self.assertTrue(all(p1['best_makespan'] >= p2['best_makespan'] for p1, p2 in zip(progress, progress[1:])))
+
+    def test_stopping(self):
+        g = GARTH(self.problem, popSize=10, schedule_limit=10 ** 6, time_limit=0)
+        self.assertEqual(len(list(g.iterate())), 1)
+        self.assertEqual(g.stop_reason, 'time_limit')
+        g = GARTH(self.problem, popSize=10, schedule_limit=10 ** 6, target_makespan=10 ** 6)
+        g.run()
+        self.assertEqual(g.stop_reason, 'target_makespan')
+        g = GARTH(self.problem, popSize=10, schedule_limit=10 ** 6, stagnation=3)
+        g.run()
+        self.assertEqual(g.stop_reason, 'stagnation')
+        self.assertGreaterEqual(g.generation, 3)
+
+    def test_lower_bound_stop(self):
+        # J3012_1 has optimal makespan equal to its critical path length
+        problem = Problem(RCPParser()(PROJECT_ROOT + 'psplib/j30rcp/J3012_1.RCP'))
+        g = GARTH(problem, popSize=10, schedule_limit=5000)
+        g.run()
+        self.assertEqual(g.stop_reason, 'lower_bound')
+        self.assertLess(g.generated_schedules, 5000)
+        self.assertEqual(g.gap, 0)
+        self.assertEqual(g.best_makespan, problem.lower_bound)
+
+    def test_reject(self):
+        g = GARTH(self.problem, popSize=20, reject=True)
+        worst = g.makespans.max()
+        g.step()
+        self.assertLessEqual(g.makespans.max(), worst)
+        self.assertLessEqual(g.generated_schedules, 80)
+        self.assertEqual(g.best.makespan, g.best_makespan)
+
+    def test_reject_duplicates(self):
+        g = GARTH(self.problem, popSize=10, cache_size=100, reject=True)
+        g.population[:] = generate_population(self.problem, 1)
+        bounds = np.empty(10, dtype=int)
+        bounds[:] = np.iinfo(int).max
+        bounds[0] = self.problem.critical_path_length()
+        g._evaluate(g._rows, bounds)
+        self.assertTrue(np.all(g.makespans > 0))
+
+    def test_checkpoint(self):
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, 'garth.npz')
+        try:
+            g = GARTH(self.problem, popSize=10)
+            g.step()
+            g.save(path)
+            g.step()
+            g.step()
+            resumed = GARTH(self.problem, checkpoint=path)
+            self.assertEqual(resumed.generation, 1)
+            self.assertEqual(resumed.params['popSize'], 10)
+            resumed.step()
+            resumed.step()
+            np.testing.assert_array_equal(resumed.makespans, g.makespans)
+            np.testing.assert_array_equal(resumed.start_times, g.start_times)
+            for rt1, rt2 in zip(resumed.rt.get_arrays(), g.rt.get_arrays()):
+                np.testing.assert_array_equal(rt1, rt2)
+            self.assertEqual(resumed.generated_schedules, g.generated_schedules)
+        finally:
+            shutil.rmtree(directory)
+
+    def test_warm_start(self):
+        g = GARTH(self.problem, popSize=10, schedule_limit=200)
+        g.run()
+        warm = GARTH(self.problem, popSize=10, warm_start=g.emigrants(3))
+        self.assertLessEqual(warm.best_makespan, g.best_makespan)
+
+    def test_priority_rule(self):
+        g = GARTH(self.problem, popSize=20, Rnew=0.1, Rcross=0.6, priority_rule='grpw')
+        g.step()
+        self.assertGreaterEqual(g.best.makespan, self.problem.critical_path_length())
+
+    def test_solve(self):
+        g, result = solve(self.problem, 3, popSize=10, schedule_limit=100)
+        self.assertEqual(result['makespan'], g.best_makespan)
+        self.assertEqual(result['start_times'], g.best.start_times_array.tolist())
+        self.assertEqual(solve(self.problem, 3, popSize=10, schedule_limit=100)[1]['makespan'], result['makespan'])
+
+    def test_population_buffers(self):
+        g = GARTH(self.problem, popSize=20)
+        populations = g._populations
+        best = g.best
+        activity_list = best.activity_list.copy()
+        for i in xrange(3):
+            g.step()
+        self.assertIs(g._populations, populations)
+        np.testing.assert_array_equal(best.activity_list, activity_list)
+        for index, array in enumerate(g.population):
+            self.assertTrue(ActivityList(self.problem, array).is_precedence_feasible())
+            self.assertEqual((g.start_times[index] + self.problem.durations).max(), g.makespans[index])
+
+    def test_uneven_population_size(self):
+        # 1 + 0 + 3 + 10 rows by rates, crossover fills the last one
+        g = GARTH(self.problem, popSize=15, schedule_limit=300)
+        self.assertEqual(g.params['numRcross'], 11)
+        g.run()
+        self.assertGreaterEqual(g.best_makespan, self.problem.lower_bound)
+        for index, array in enumerate(g.population):
+            self.assertTrue(ActivityList(self.problem, array).is_precedence_feasible())
+            self.assertEqual((g.start_times[index] + self.problem.durations).max(), g.makespans[index])
+
+
+class StatsTestCase(unittest.TestCase):
+    def setUp(self):
+        parser = RCPParser()
+        self.problem_dict = parser(TEST_FILE)
+        self.problem = Problem(self.problem_dict)
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_step(self):
+        stats = Stats()
+        g = GARTH(self.problem, popSize=20, stats=stats)
+        g.step()
+        self.assertEqual(len(stats.generations), 2)
+        self.assertEqual(stats.generations[-1]['generated_schedules'], g.generated_schedules)
+        self.assertEqual(stats.generations[-1]['best_makespan'], g.best.makespan)
+        for name in ('generate', 'mutate', 'crossover', 'decode', 'justify', 'rt_update', 'store'):
+            self.assertIn(name, stats.phase_times)
+        self.assertEqual(stats.phase_calls['decode'], 2)
+
+    def test_export(self):
+        stats = Stats()
+        GARTH(self.problem, popSize=10, stats=stats).step()
+        json_path = os.path.join(self.directory, 'stats.json')
+        stats.to_json(json_path)
+        with open(json_path) as f:
+            self.assertEqual(len(json.load(f)['generations']), 2)
+        csv_path = os.path.join(self.directory, 'stats.csv')
+        stats.to_csv(csv_path)
+        with open(csv_path) as f:
+            self.assertEqual(len(f.readlines()), 3)
+
+
+class BenchmarkTestCase(unittest.TestCase):
+    def test_run_benchmark(self):
+        report = run_benchmark(('j30',), instances=1, seeds=(0, 1), schedule_limit=100, popSize=10)
+        summary = report['sets']['j30']['summary']
+        self.assertEqual(summary['runs'], 2)
+        self.assertGreaterEqual(summary['mean_deviation'], 0)
+        self.assertGreater(summary['schedules_per_second'], 0)
+        self.assertGreater(summary['peak_memory_kb'], 0)
+
+
+class InstanceStoreTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.files = [TEST_FILE, PROJECT_ROOT + 'psplib/j30rcp/J3010_1.RCP']
+        self.store = compile_store(self.files, self.directory)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_problem_dict(self):
+        self.assertEqual(len(self.store), 2)
+        self.assertIn('J301_1.RCP', self.store)
+        for file_path in self.files:
+            parsed = RCPParser()(file_path)
+            stored = self.store.problem_dict(file_path)
+            self.assertEqual(stored['num_activities'], parsed['num_activities'])
+            np.testing.assert_array_equal(stored['res_constraints'], parsed['res_constraints'])
+            np.testing.assert_array_equal(stored['activities']['duration'], parsed['activities']['duration'])
+            np.testing.assert_array_equal(stored['activities']['res_demands'], parsed['activities']['res_demands'])
+            self.assertListEqual(stored['edges'], parsed['edges'])
+
+    def test_problem(self):
+        problem = InstanceStore(self.directory).problem('J301_1.RCP')
+        np.testing.assert_array_equal(problem.closure, Problem(RCPParser()(TEST_FILE)).closure)
+        self.assertSetEqual({0, 2, 3, 7, 8, 11}, problem.predecessors_all(13))
+
+    def test_run_benchmark(self):
+        report = run_benchmark(('j30',), instances=1, seeds=(0,), store=self.directory,
+                               schedule_limit=100, popSize=10)
+        self.assertEqual(report['sets']['j30']['summary']['runs'], 1)
+
+
+class BatchTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.database = os.path.join(self.directory, 'results.sqlite')
+        self.patterns = [PROJECT_ROOT + 'psplib/j30rcp/J301_*.RCP']
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_instance_paths(self):
+        paths = instance_paths(self.patterns)
+        self.assertEqual(len(paths), 10)
+        self.assertEqual(instance_size(paths[0]), 32)
+
+    def test_run_batch(self):
+        patterns = [TEST_FILE, PROJECT_ROOT + 'psplib/j60rcp/J601_1.RCP']
+        self.assertEqual(run_batch(patterns, self.database, 2, 0, schedule_limit=40, popSize=10), 4)
+        # finished pairs are skipped
+        self.assertEqual(run_batch(patterns, self.database, 3, 1, schedule_limit=40, popSize=10), 2)
+        store = ResultStore(self.database)
+        self.assertEqual(len(store.completed()), 6)
+        self.assertSetEqual(set(store.best()), {'J301_1.RCP', 'J601_1.RCP'})
+        store.close()
+
+
+class FakeRedis(object):
+    # stand-in for redis.StrictRedis, records round trips
+    def __init__(self):
+        self.lists = {}
+        self.hashes = {}
+        self.round_trips = 0
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def lpush(self, key, value):
+        self.lists.setdefault(key, []).insert(0, value)
+
+    def hset(self, key, field, value):
+        self.hashes.setdefault(key, {})[field] = value
+
+
+class FakePipeline(object):
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    def lpush(self, *args):
+        self.commands.append((self.client.lpush, args))
+
+    def hset(self, *args):
+        self.commands.append((self.client.hset, args))
+
+    def execute(self):
+        self.client.round_trips += 1
+        for command, args in self.commands:
+            command(*args)
+
+
+class WorkerTestCase(unittest.TestCase):
+    def test_problem_cache(self):
+        cache = ProblemCache(1)
+        problem = cache.get(TEST_FILE)
+        self.assertIs(cache.get(TEST_FILE), problem)
+        cache.get(PROJECT_ROOT + 'psplib/j30rcp/J3010_1.RCP')
+        self.assertEqual(len(cache), 1)
+        self.assertIsNot(cache.get(TEST_FILE), problem)
+        self.assertEqual((cache.hits, cache.misses), (1, 3))
 
+    def test_write_results(self):
+        runs = [(TEST_FILE, 0), (TEST_FILE, 1)]
+        results = solve_runs(runs, ProblemCache(), popSize=10, schedule_limit=40)
+        client = FakeRedis()
+        write_runs(client, results, 7)
+        best = write_best(client, results)
+        self.assertEqual(client.round_trips, 2)
+        self.assertEqual(len(client.lists['test_run:J301_1.RCP:7']), 2)
+        self.assertEqual(client.hashes['mybest:J301_1.RCP']['makespan'], best[TEST_FILE]['makespan'])
+        self.assertEqual(best[TEST_FILE]['makespan'], min(result['makespan'] for result in results))
+        self.assertListEqual(chunks(range(5), 2), [[0, 1], [2, 3], [4]])
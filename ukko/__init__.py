@@ -3,8 +3,9 @@
 from .rcpparser import RCPParser
 from .problem import Problem
 from .activity_list import ActivityList
-from .schedule import Schedule
-from .sgs import SSGS
+from .schedule import Schedule, LazySchedule
+from .sgs import SSGS, FastSSGS, PSGS, BatchSSGS
 from .rthypothesis import RTHypothesis, RTSystem
 from .garth import GARTH
+from .island import IslandGARTH
 from .resource_utilization import ResourceUtilization
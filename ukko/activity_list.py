@@ -5,10 +5,119 @@ import random
 from utils import PrecedenceException
 
 
+def priority_weights(problem, rule):
+    # positive weight of every activity, higher weight means it is preferred when sampling
+    if rule == 'mts':
+        # most total successors
+        return problem.closure.sum(axis=1) + 1.0
+    if rule == 'grpw':
+        # greatest rank positional weight, duration of activity and its direct successors
+        return problem.durations + np.dot(problem.predecessor_mask.T, problem.durations) + 1.0
+    raise ValueError("Unknown priority rule {0}.".format(rule))
+
+
+def generate_population(problem, size, weights=None):
+    # returns matrix with one random precedence feasible activity list per row
+    num_activities = problem.num_activities
+    successors = [array.tolist() for array in problem.successor_arrays]
+    num_predecessors = problem.predecessor_mask.sum(axis=1).tolist()
+    weights = [1.0] * num_activities if weights is None else np.asarray(weights, dtype=float).tolist()
+    uniform = len(set(weights)) == 1
+    population = np.zeros((size, num_activities), dtype=int)
+    for row in xrange(size):
+        remaining = list(num_predecessors)
+        maystart = [activity for activity in xrange(num_activities) if not remaining[activity]]
+        total = sum(weights[activity] for activity in maystart)
+        activities = []
+        while maystart:
+            if uniform:
+                index = int(random.random() * len(maystart))
+            else:
+                index = _weighted_index(maystart, weights, random.random() * total)
+            activity = maystart[index]
+            maystart[index] = maystart[-1]
+            maystart.pop()
+            total -= weights[activity]
+            activities.append(activity)
+            for successor in successors[activity]:
+                remaining[successor] -= 1
+                if not remaining[successor]:
+                    maystart.append(successor)
+                    total += weights[successor]
+        population[row] = activities
+    return population
+
+
+def _weighted_index(activities, weights, threshold):
+    for index, activity in enumerate(activities):
+        threshold -= weights[activity]
+        if threshold < 0:
+            return index
+    return len(activities) - 1
+
+
+def crossover_population(population, parents, c1, c2):
+    # two point crossover of whole population matrix, row k of result is the same child as
+    # ActivityList(population[parents[k, 0]]).crossover(ActivityList(population[parents[k, 1]]), c1[k], c2[k])
+    population = np.asarray(population, dtype=int)
+    parents = np.asarray(parents, dtype=int)
+    size = len(parents)
+    num_activities = population.shape[1]
+    rows = np.arange(size)[:, np.newaxis]
+    positions = np.arange(num_activities)
+    c1 = np.asarray(c1, dtype=int)[:, np.newaxis]
+    c2 = np.asarray(c2, dtype=int)[:, np.newaxis]
+    mother = population[parents[:, 0]]
+    father = population[parents[:, 1]]
+    # taken[k, a] is True when activity a is already placed in child k
+    taken = np.zeros((size, num_activities), dtype=bool)
+    head = positions < c1
+    taken[rows, mother] = head
+    # middle part is filled by not taken activities in father's order
+    free = ~taken[rows, father]
+    free_rank = np.cumsum(free, axis=1) - 1
+    middle = free & (free_rank < c2 - c1)
+    taken[rows, father] |= middle
+    # and the rest keeps mother's order
+    rest = ~taken[rows, mother]
+    rest_rank = np.cumsum(rest, axis=1) - 1
+    # scattered values not belonging to child are dropped into extra last column
+    children = np.empty((size, num_activities + 1), dtype=int)
+    children[rows, np.where(head, positions, np.where(rest, c2 + rest_rank, num_activities))] = mother
+    children[rows, np.where(middle, c1 + free_rank, num_activities)] = father
+    return children[:, :num_activities]
+
+
+def shift_population(problem, population, activities, directions, steps):
+    # moves activities[j] in row k by directions[k, j] * steps positions, but at most just behind its last
+    # predecessor or in front of its first successor, returns new matrix
+    population = np.array(population, dtype=int)
+    size, num_activities = population.shape
+    rows = np.arange(size)[:, np.newaxis]
+    directions = np.broadcast_to(directions, (size, len(activities)))
+    positions = np.empty_like(population)
+    positions[rows, population] = np.arange(num_activities)
+    for j, activity in enumerate(activities):
+        current = positions[:, activity]
+        predecessors = problem.predecessor_arrays[activity]
+        successors = problem.successor_arrays[activity]
+        first = positions[:, predecessors].max(axis=1) + 1 if len(predecessors) else 0
+        last = positions[:, successors].min(axis=1) - 1 if len(successors) else num_activities - 1
+        target = np.clip(current + directions[:, j] * steps, first, last)
+        # one rotation of the part between current and target position
+        positions -= (positions > current[:, np.newaxis]) & (positions <= target[:, np.newaxis])
+        positions += (positions < current[:, np.newaxis]) & (positions >= target[:, np.newaxis])
+        positions[:, activity] = target
+    population[rows, positions] = np.arange(num_activities)
+    return population
+
+
 class ActivityList(object):
     RIGHT_SHIFT = 1
     LEFT_SHIFT = -1
 
+    __slots__ = ('problem', '_array')
+
     def __init__(self, problem, array=None):
         self.problem = problem
         if array is None:
@@ -31,50 +140,21 @@ class ActivityList(object):
         return str(self._array)
 
     def is_precedence_feasible(self):
-        act_previous = set()
-        for activity in self:
-            if not self.problem.contains_all_predecessors(act_previous, activity):
-                return False
-            act_previous.add(activity)
-        return True
+        # activities missing in the list are placed after the end
+        positions = np.empty(self.problem.num_activities, dtype=int)
+        positions[:] = self.problem.num_activities
+        positions[self._array] = np.arange(len(self._array))
+        edges = self.problem.edges
+        return bool(np.all(positions[edges[:, 0]] < positions[edges[:, 1]]))
 
     def generate_random(self):
-        assigned_activities = set()
-        maystart = [0]
-        for i in xrange(0, self.problem.num_activities):
-            activity = random.choice(maystart)
-            self._array[i] = activity
-            assigned_activities.add(activity)
-            maystart.remove(activity)
-            for succ in self.problem.successors(activity):
-                if self.problem.contains_all_predecessors(assigned_activities, succ):
-                    maystart.append(succ)
+        self._array[:] = generate_population(self.problem, 1)[0]
         return self
 
     def shift(self, activity, direction, steps):
-        index = np.where(self._array == activity)[0][0]
-        i = 0
-        for i in xrange(steps):
-            current_index = index + i * direction
-            next_index = current_index + direction
-            try:
-                if next_index < self.problem.num_activities:
-                    self._swap(current_index, current_index + direction)
-                else:
-                    break
-            except PrecedenceException:
-                break
-        else:
-            return i + 1
-        return i
-
-    def _swap(self, index1, index2):
-        lower_index = index1 if index1 < index2 else index2
-        higher_index = index1 if index1 > index2 else index2
-        if self._array[lower_index] not in self.problem.predecessors_all(self._array[higher_index]):
-            self._array[index1], self._array[index2] = self._array[index2], self._array[index1]
-        else:
-            raise PrecedenceException("Swap of {0} and {1} would break precedence condition.".format(self._array[lower_index], self._array[higher_index]))
+        index = np.flatnonzero(self._array == activity)[0]
+        self._array[:] = shift_population(self.problem, self._array[np.newaxis], [activity], direction, steps)[0]
+        return abs(np.flatnonzero(self._array == activity)[0] - index)
 
     def crossover(self, other, c1, c2):
         child = ActivityList(self.problem)
@@ -0,0 +1,114 @@
+#!/usr/bin/env python2.7
+# -*- coding: utf-8 -*-
+import argparse
+import glob
+import itertools
+import json
+import multiprocessing
+import os.path
+import sqlite3
+
+from rcpparser import RCPParser
+from problem import Problem
+from garth import solve
+
+
+def instance_paths(patterns):
+    # patterns are directories with .RCP files or glob patterns
+    paths = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            pattern = os.path.join(pattern, '*.RCP')
+        paths.extend(sorted(glob.glob(pattern)))
+    return paths
+
+
+def instance_size(path):
+    # number of activities from the first line, so the largest instances can be started first
+    with open(path) as f:
+        return int(f.readline().split()[0])
+
+
+class ResultStore(object):
+    # SQLite table of finished runs, one row per (instance, seed)
+
+    def __init__(self, path):
+        self.connection = sqlite3.connect(path)
+        self.connection.execute('CREATE TABLE IF NOT EXISTS results ('
+                                'instance TEXT, seed INTEGER, path TEXT, makespan INTEGER, lower_bound INTEGER, '
+                                'schedules INTEGER, wall_time REAL, start_times TEXT, '
+                                'PRIMARY KEY (instance, seed))')
+        self.connection.commit()
+
+    def completed(self):
+        return set(self.connection.execute('SELECT instance, seed FROM results'))
+
+    def add(self, result):
+        self.connection.execute('INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                                (result['instance'], result['seed'], result['path'], result['makespan'],
+                                 result['lower_bound'], result['schedules'], result['wall_time'],
+                                 json.dumps(result['start_times'])))
+        self.connection.commit()
+
+    def best(self):
+        return dict(self.connection.execute('SELECT instance, MIN(makespan) FROM results GROUP BY instance'))
+
+    def close(self):
+        self.connection.close()
+
+
+def solve_task(task):
+    path, seed, params = task
+    g, result = solve(Problem(RCPParser()(path)), seed, **params)
+    result.update({'instance': os.path.basename(path), 'path': path})
+    return result
+
+
+def run_batch(patterns, database, repetitions=1, processes=None, **params):
+    # solves every instance with seeds 0..repetitions-1, pairs already in database are skipped
+    store = ResultStore(database)
+    completed = store.completed()
+    paths = instance_paths(patterns)
+    sizes = dict((path, instance_size(path)) for path in paths)
+    tasks = [(path, seed, params) for path in paths for seed in xrange(repetitions)
+             if (os.path.basename(path), seed) not in completed]
+    tasks.sort(key=lambda task: sizes[task[0]], reverse=True)
+    pool = multiprocessing.Pool(processes) if processes != 0 else None
+    try:
+        # one task at a time keeps workers balanced, results are stored as soon as they come
+        results = pool.imap_unordered(solve_task, tasks) if pool is not None else itertools.imap(solve_task, tasks)
+        for result in results:
+            store.add(result)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+        store.close()
+    return len(tasks)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Solve sets of RCP instances without broker, results go to SQLite')
+    parser.add_argument('patterns', nargs='+', help='Directories with .RCP files or glob patterns')
+    parser.add_argument('--database', default='results.sqlite', help='SQLite file, finished runs are skipped')
+    parser.add_argument('--repetitions', type=int, default=1, help='Runs per instance with seeds 0..N-1')
+    parser.add_argument('--processes', type=int, default=None,
+                        help='Worker processes, number of CPUs by default, 0 solves in this process')
+    parser.add_argument('--schedule-limit', type=int, default=5000, help='Schedules generated per run')
+    parser.add_argument('--pop-size', type=int, default=100, help='Population size')
+    parser.add_argument('--time-limit', type=float, default=None, help='Seconds per run')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    solved = run_batch(args.patterns, args.database, args.repetitions, args.processes,
+                       schedule_limit=args.schedule_limit, popSize=args.pop_size, time_limit=args.time_limit)
+    store = ResultStore(args.database)
+    best = store.best()
+    store.close()
+    print 'Solved {0} runs, {1} instances in {2}'.format(solved, len(best), args.database)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python2.7
+# -*- coding: utf-8 -*-
+import argparse
+import glob
+import json
+import multiprocessing
+import os.path
+import resource
+
+import numpy as np
+
+from rcpparser import RCPParser
+from problem import Problem
+from garth import solve
+from instance_store import InstanceStore
+
+PSPLIB_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'psplib')
+INSTANCE_SETS = {'j30': 'j30rcp', 'j60': 'j60rcp', 'j120': 'j120rcp'}
+
+
+def instance_files(instance_set, instances=None, psplib_dir=PSPLIB_DIR):
+    files = sorted(glob.glob(os.path.join(psplib_dir, INSTANCE_SETS[instance_set], '*.RCP')))
+    return files[:instances] if instances else files
+
+
+def peak_memory():
+    # kilobytes on Linux, for the whole life of this process
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def load_problem(file_path, store=None):
+    # compiled store is used when it contains the instance, parsing is fallback
+    if store is not None and os.path.basename(file_path) in store:
+        return store.problem(file_path)
+    return Problem(RCPParser()(file_path))
+
+
+def solve_instance(file_path, seed, store=None, **params):
+    problem = load_problem(file_path, store)
+    g, result = solve(problem, seed, **params)
+    critical_path_length = problem.critical_path_length()
+    result.update({'instance': os.path.basename(file_path),
+                   'critical_path_length': critical_path_length,
+                   'deviation': (result['makespan'] - critical_path_length) / float(critical_path_length),
+                   'schedules_per_second': result['schedules'] / result['wall_time']})
+    return result
+
+
+def summarize(results):
+    wall_time = sum(result['wall_time'] for result in results)
+    schedules = sum(result['schedules'] for result in results)
+    return {'runs': len(results),
+            'mean_makespan': np.mean([result['makespan'] for result in results]),
+            'mean_deviation': np.mean([result['deviation'] for result in results]),
+            'proven_optimal': sum(1 for result in results if result['gap'] == 0),
+            'schedules': schedules,
+            'wall_time': wall_time,
+            'schedules_per_second': schedules / wall_time,
+            'peak_memory_kb': peak_memory()}
+
+
+def run_set(instance_set, instances=None, seeds=(0,), psplib_dir=PSPLIB_DIR, store=None, **params):
+    if isinstance(store, basestring):
+        store = InstanceStore(store)
+    results = []
+    for file_path in instance_files(instance_set, instances, psplib_dir):
+        for seed in seeds:
+            results.append(solve_instance(file_path, seed, store, **params))
+    return {'summary': summarize(results), 'results': results}
+
+
+def _run_set(args):
+    instance_set, instances, seeds, psplib_dir, store, params = args
+    return run_set(instance_set, instances, seeds, psplib_dir, store, **params)
+
+
+def run_benchmark(instance_sets=('j30',), instances=None, seeds=(0,), psplib_dir=PSPLIB_DIR, store=None, **params):
+    # every set is solved in its own child process, so its peak memory is not raised by the sets before it
+    if isinstance(store, InstanceStore):
+        store = store.store_path
+    report = {'params': params, 'seeds': list(seeds), 'sets': {}}
+    for instance_set in instance_sets:
+        pool = multiprocessing.Pool(1)
+        try:
+            report['sets'][instance_set] = pool.apply(_run_set, ((instance_set, instances, seeds, psplib_dir,
+                                                                  store, params),))
+        finally:
+            pool.close()
+            pool.join()
+    return report
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Benchmark GARTH on psplib instances')
+    parser.add_argument('--sets', nargs='+', default=['j30'], choices=sorted(INSTANCE_SETS),
+                        help='Instance sets to solve')
+    parser.add_argument('--instances', type=int, default=None, help='Number of instances taken from each set')
+    parser.add_argument('--seeds', nargs='+', type=int, default=[0], help='Random seeds, one run per seed')
+    parser.add_argument('--schedule-limit', type=int, default=5000, help='Schedules generated per run')
+    parser.add_argument('--pop-size', type=int, default=100, help='Population size')
+    parser.add_argument('--batch', action='store_true', help='Use batch evaluation')
+    parser.add_argument('--cache-size', type=int, default=0, help='Size of fitness cache')
+    parser.add_argument('--store', default=None, help='Compiled instance store, see instance_store.py')
+    parser.add_argument('--output', default=None, help='JSON file for results, printed to stdout if omitted')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    report = run_benchmark(args.sets, args.instances, args.seeds, store=args.store,
+                           schedule_limit=args.schedule_limit, popSize=args.pop_size,
+                           batch=args.batch, cache_size=args.cache_size)
+    for instance_set in args.sets:
+        summary = report['sets'][instance_set]['summary']
+        print ('{0}: runs {1}, deviation {2:.2%}, proven optimal {3}, {4:.1f} schedules/s, wall time {5:.1f} s, '
+               'peak memory {6} kB').format(
+            instance_set, summary['runs'], summary['mean_deviation'], summary['proven_optimal'],
+            summary['schedules_per_second'], summary['wall_time'], summary['peak_memory_kb'])
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        print json.dumps(report, indent=2)
+
+
+if __name__ == '__main__':
+    main()
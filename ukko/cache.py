@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+
+from collections import OrderedDict
+
+
+class LRUCache(object):
+    # bounded mapping dropping least recently used entries, subclasses turn their arguments into keys
+
+    def __init__(self, size):
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+
+    def __len__(self):
+        return len(self._data)
+
+    def _get(self, key):
+        try:
+            value = self._data.pop(key)
+        except KeyError:
+            self.misses += 1
+            return None
+        self._data[key] = value
+        self.hits += 1
+        return value
+
+    def _put(self, key, value):
+        self._data.pop(key, None)
+        self._data[key] = value
+        while len(self._data) > self.size:
+            self._data.popitem(last=False)
+
+
+class FitnessCache(LRUCache):
+    # LRU cache of evaluation results keyed by activity list
+
+    @staticmethod
+    def key(array, variant=None):
+        # variant tells apart results of the same activity list, e.g. decoded by serial or parallel SGS
+        return array.tostring() if variant is None else (variant, array.tostring())
+
+    def get(self, array, variant=None):
+        return self._get(self.key(array, variant))
+
+    def put(self, array, value, variant=None):
+        self._put(self.key(array, variant), value)
+
+    def lookup(self, population, variants=None):
+        # cached values (None when missing) and indices of missing rows grouped by activity list and variant
+        values = []
+        missing = OrderedDict()
+        for index, array in enumerate(population):
+            variant = variants[index] if variants is not None else None
+            key = self.key(array, variant)
+            if key in missing:
+                # already waiting for evaluation in this population
+                self.hits += 1
+                missing[key].append(index)
+                values.append(None)
+                continue
+            value = self._get(key)
+            if value is None:
+                missing[key] = [index]
+            values.append(value)
+        return values, missing.values()
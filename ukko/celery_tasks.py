@@ -1,54 +1,55 @@
 from celery_app import app
-import ukko
-from .rcpparser import RCPParser
-from .problem import Problem
-from .garth import GARTH
+from .worker import ProblemCache, chunks, solve_runs, write_runs, write_best
 from celery import chord
 from celery.utils.log import get_task_logger
 import redis
-import os.path
 
 logger = get_task_logger(__name__)
-c = redis.StrictRedis()
+# compiled problems are kept between tasks of one worker process
+problems = ProblemCache()
+_client = None
+
+
+def client():
+    global _client
+    if _client is None:
+        _client = redis.StrictRedis()
+    return _client
+
 
 @app.task
-def compute_instance(filename, test_run_id):
-    rcpparser = RCPParser()
-    problem_dict = rcpparser(filename)
-    problem = Problem(problem_dict)
-    g = GARTH(problem)
-    g.run()
-    best_dict = {
-        'makespan': g.best.makespan,
-        'schedule': str(g.best)
-    }
-    key = "test_run:{}:{}".format(os.path.basename(filename), test_run_id)
-    c.lpush(key, g.best.makespan)
-    return best_dict
+def compute_instance(filename, test_run_id, seed=None):
+    results = solve_runs([(filename, seed)], problems)
+    write_runs(client(), results, test_run_id)
+    return results[0]
 
 
 @app.task
-def compute_instance_multiple(filename):
-    test_run_id = c.incr('test_run_id')
-    header = [compute_instance.s(filename, test_run_id) for i in xrange(2)]
-    callback = process_run_results.s(filename)
-    chord(header)(callback)
+def compute_chunk(runs, test_run_id):
+    # runs is list of (filename, seed) pairs solved in one message
+    results = solve_runs(runs, problems)
+    write_runs(client(), results, test_run_id)
+    return results
 
 
 @app.task
-def process_run_results(result, filename):
-    logger.info("Filename %s, results %s", filename, result)
-    result_makespan = [d['makespan'] for d in result]
-    best_key = 'mybest:'.format(os.path.basename(filename))
-    best_makespan = min(result_makespan)
-    best_schedule = ''
-    for d in result:
-        if d['makespan'] == best_makespan:
-            best_schedule = d['schedule']
-            break
-    c.hset(best_key, 'makespan', best_makespan)
-    c.hset(best_key, 'schedule', best_schedule)
+def compute_instance_multiple(filename, repetitions=2, chunk_size=2):
+    compute_instances([filename], repetitions, chunk_size)
 
 
+@app.task
+def compute_instances(filenames, repetitions=2, chunk_size=10):
+    test_run_id = client().incr('test_run_id')
+    runs = [(filename, seed) for filename in filenames for seed in xrange(repetitions)]
+    header = [compute_chunk.s(chunk, test_run_id) for chunk in chunks(runs, chunk_size)]
+    callback = process_run_results.s()
+    chord(header)(callback)
 
 
+@app.task
+def process_run_results(result):
+    results = [run for chunk in result for run in chunk]
+    best = write_best(client(), results)
+    for filename, run in best.items():
+        logger.info("Filename %s, best makespan %s of %s runs", filename, run['makespan'],
+                    len([r for r in results if r['filename'] == filename]))
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import random
+
+import numpy as np
+
+# params which are objects or describe checkpointing itself are not stored
+SKIPPED_PARAMS = ('stats', 'checkpoint', 'warm_start')
+
+
+def save_checkpoint(garth, path):
+    # writes population, RT matrices, counters and state of both random generators into one npz file
+    np_state = np.random.get_state()
+    random_state = random.getstate()
+    meta = {'params': dict((key, value) for key, value in garth.params.items() if key not in SKIPPED_PARAMS),
+            'generated_schedules': garth.generated_schedules,
+            'generation': garth.generation,
+            'np_random': [np_state[0], np_state[2], np_state[3], np_state[4]],
+            'random': [random_state[0], random_state[2]]}
+    temporary_path = path + '.tmp'
+    # file object keeps numpy from appending .npz to path
+    with open(temporary_path, 'wb') as f:
+        np.savez_compressed(f,
+                            meta=np.array(json.dumps(meta)),
+                            population=garth.population.astype(np.int32),
+                            start_times=garth.start_times.astype(np.int32),
+                            makespans=garth.makespans,
+                            rt=np.array(garth.rt.get_arrays()),
+                            np_random_keys=np_state[1],
+                            random_keys=np.array(random_state[1], dtype=np.int64))
+    os.rename(temporary_path, path)
+
+
+def load_checkpoint(path):
+    with open(path, 'rb') as f:
+        data = np.load(f)
+        checkpoint = dict((key, data[key]) for key in data.files)
+    meta = json.loads(str(checkpoint.pop('meta')))
+    checkpoint.update(meta)
+    return checkpoint
+
+
+def restore_random_state(checkpoint):
+    name, position, has_gauss, cached_gaussian = checkpoint['np_random']
+    np.random.set_state((str(name), checkpoint['np_random_keys'], position, has_gauss, cached_gaussian))
+    version, gauss_next = checkpoint['random']
+    random.setstate((version, tuple(checkpoint['random_keys'].tolist()), gauss_next))
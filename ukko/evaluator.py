@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+
+import ctypes
+import multiprocessing
+from multiprocessing.sharedctypes import RawArray
+
+import numpy as np
+
+from problem import Problem
+from sgs import FastSSGS, PSGS
+from justification import Justification
+
+_worker = {}
+
+
+def _share(array):
+    array = np.ascontiguousarray(array)
+    raw = RawArray(ctypes.c_char, max(array.nbytes, 1))
+    _view(raw, array.shape, array.dtype)[...] = array
+    return raw, array.shape, array.dtype.str
+
+
+def _view(raw, shape, dtype):
+    dtype = np.dtype(dtype)
+    return np.frombuffer(raw, dtype=dtype, count=int(np.prod(shape))).reshape(shape)
+
+
+def _init_worker(num_activities, num_resources, shared, justify):
+    arrays = dict((key, _view(*value)) for key, value in shared.items())
+    problem_dict = {'num_activities': num_activities,
+                    'num_resources': num_resources,
+                    'res_constraints': arrays['res_constraints'],
+                    'activities': {'duration': arrays['duration'],
+                                   'res_demands': arrays['res_demands']},
+                    'edges': arrays['edges'],
+                    'closure': arrays['closure']}
+    problem = Problem(problem_dict)
+    _worker['problem'] = problem
+    _worker['ssgs'] = FastSSGS(problem)
+    _worker['psgs'] = PSGS(problem)
+    _worker['justification'] = Justification(problem) if justify else None
+
+
+def decode_activity_lists(ssgs, population, batch_ssgs=None, psgs=None, parallel=None, bounds=None, out=None,
+                          rows=None):
+    # parallel is boolean vector selecting rows decoded by psgs instead of ssgs, bounds is vector of makespans
+    # decoded rows have to get below, otherwise they are rejected early and get makespan -1,
+    # out is optional pair of start times matrix and makespans vector written in place, rows selects rows to decode
+    size, num_activities = population.shape
+    if out is None:
+        out = np.zeros((size, num_activities), dtype=int), np.zeros(size, dtype=int)
+    start_times, makespans = out
+    if rows is None:
+        rows = np.arange(size)
+    if parallel is None:
+        parallel = np.zeros(size, dtype=bool)
+    serial = rows[~parallel[rows]]
+    # batch decoding can not stop early
+    if batch_ssgs is not None and bounds is None:
+        if len(serial):
+            start_times[serial], makespans[serial] = batch_ssgs.decode(population[serial])
+    else:
+        for index in serial:
+            bound = bounds[index] if bounds is not None else None
+            makespan = ssgs.decode(population[index], bound, start_times[index])[1]
+            makespans[index] = makespan if makespan is not None else -1
+    for index in rows[parallel[rows]]:
+        bound = bounds[index] if bounds is not None else None
+        makespan = psgs.decode(population[index], bound, start_times[index])[1]
+        makespans[index] = makespan if makespan is not None else -1
+    return start_times, makespans
+
+
+def _result_buffers(out, shape):
+    if out is not None:
+        return out
+    return np.zeros(shape, dtype=int), np.zeros(shape[0], dtype=int), np.zeros(shape, dtype=int)
+
+
+def right_shift_activity_lists(ssgs, population, start_times, out=None, rows=None):
+    # returns start times and makespans of right shifted schedules together with their serialization,
+    # out is optional triple of buffers written in place, serialization may go to population itself
+    shifted_start_times, shifted_makespans, serialized = _result_buffers(out, population.shape)
+    if rows is None:
+        rows = xrange(len(population))
+    # one schedule is reused for the whole population
+    schedule = None
+    for index in rows:
+        schedule = ssgs.build_schedule(population[index], start_times[index], schedule)
+        schedule.right_shift()
+        for activity, start_time in schedule.start_times_activities.items():
+            shifted_start_times[index, activity] = start_time
+        shifted_makespans[index] = schedule.makespan
+        serialized[index] = schedule.serialize()._array
+    return shifted_start_times, shifted_makespans, serialized
+
+
+def justify_activity_lists(justification, start_times, out=None, rows=None):
+    # returns start times and makespans of double justified schedules together with their activity order,
+    # out is optional triple of buffers written in place
+    justified_start_times, justified_makespans, activity_orders = _result_buffers(out, start_times.shape)
+    if rows is None:
+        rows = xrange(len(start_times))
+    for index in rows:
+        justified_start_times[index], justified_makespans[index], activity_orders[index] = \
+            justification.justify(start_times[index])
+    return justified_start_times, justified_makespans, activity_orders
+
+
+def evaluate_activity_lists(ssgs, population, batch_ssgs=None, justification=None, psgs=None, parallel=None):
+    start_times, makespans = decode_activity_lists(ssgs, population, batch_ssgs, psgs, parallel)
+    if justification is not None:
+        return (start_times, makespans) + justify_activity_lists(justification, start_times)
+    return (start_times, makespans) + right_shift_activity_lists(ssgs, population, start_times)
+
+
+def _evaluate_chunk(chunk):
+    activity_lists, parallel = chunk
+    return evaluate_activity_lists(_worker['ssgs'], activity_lists, justification=_worker['justification'],
+                                   psgs=_worker['psgs'], parallel=parallel)
+
+
+class PoolEvaluator(object):
+    # decodes and justifies activity lists in worker processes, problem arrays live in shared memory
+
+    def __init__(self, problem, processes=None, chunk_size=10, justify=True):
+        self.problem = problem
+        self.processes = processes or multiprocessing.cpu_count()
+        self.chunk_size = chunk_size
+        shared = {'duration': _share(problem.durations),
+                  'res_demands': _share(problem.res_demands),
+                  'res_constraints': _share(problem.res_constraints),
+                  'edges': _share(problem.edges),
+                  'closure': _share(problem.closure)}
+        self.pool = multiprocessing.Pool(self.processes, initializer=_init_worker,
+                                         initargs=(problem.num_activities, problem.num_resources, shared, justify))
+
+    def evaluate(self, population, parallel=None):
+        # population is matrix with one activity list per row, parallel selects rows decoded by PSGS
+        population = np.asarray(population, dtype=int)
+        if parallel is None:
+            parallel = np.zeros(len(population), dtype=bool)
+        chunks = [(population[i:i + self.chunk_size], parallel[i:i + self.chunk_size])
+                  for i in xrange(0, len(population), self.chunk_size)]
+        results = self.pool.map(_evaluate_chunk, chunks)
+        return tuple(np.concatenate(parts) for parts in zip(*results))
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
@@ -1,16 +1,24 @@
 # -*- coding: utf-8 -*-
 
-from activity_list import ActivityList
-from sgs import SSGS
-from schedule import Schedule
+from activity_list import ActivityList, generate_population, crossover_population, shift_population, priority_weights
+from sgs import FastSSGS, BatchSSGS, PSGS
 from rthypothesis import RTSystem
+from evaluator import PoolEvaluator, decode_activity_lists, right_shift_activity_lists, justify_activity_lists
+from justification import Justification
+from cache import FitnessCache
+from stats import NULL_PHASE
+from schedule import LazySchedule
+from checkpoint import save_checkpoint, load_checkpoint, restore_random_state
 
 import numpy as np
+import os.path
 import random
+import time
 
 
 class GARTH(object):
     def __init__(self, problem, **kwargs):
+        self.start_time = time.time()
         self.problem = problem
         self.params = {'popSize': 100,
                        'Rcopy': 0.1,
@@ -19,95 +27,368 @@ class GARTH(object):
                        'Rcross': 0.7,
                        'nSelJobs': 5,
                        'dist': 10000,
-                       'schedule_limit': 5000}
+                       'schedule_limit': 5000,
+                       'batch': False,
+                       'processes': 0,
+                       'chunk_size': 10,
+                       'cache_size': 0,
+                       'stats': None,
+                       'justification': 'double',
+                       'sgs': 'serial',
+                       'parallel_rate': 0.5,
+                       'priority_rule': None,
+                       'time_limit': None,
+                       'target_makespan': None,
+                       'stagnation': None,
+                       'stop_at_lower_bound': True,
+                       # heuristic, child whose decoding is not shorter than the worst current makespan is
+                       # replaced by its parent, justification could still have improved it
+                       'reject': False,
+                       'warm_start': None,
+                       'checkpoint': None,
+                       'checkpoint_interval': 10}
         self.params.update(kwargs)
-        for key in ('Rcopy', 'Rnew', 'Rmut', 'Rcross'):
+        # existing checkpoint file is resumed with its params, explicitly given ones take precedence
+        checkpoint = None
+        if self.params['checkpoint'] is not None and os.path.exists(self.params['checkpoint']):
+            checkpoint = load_checkpoint(self.params['checkpoint'])
+            self.params.update(checkpoint['params'])
+            self.params.update(kwargs)
+        for key in ('Rcopy', 'Rnew', 'Rmut'):
             self.params['num' + key] = int(self.params['popSize'] * self.params[key])
+        # rounding leftover goes to crossover, so every row of the next generation is filled
+        self.params['numRcross'] = self.params['popSize'] - self.params['numRcopy'] - self.params['numRnew'] - \
+            self.params['numRmut']
         self.rt = RTSystem(self.problem)
-        self.ssgs = SSGS(self.problem)
-        self.population = np.empty(self.params['popSize'], dtype=ActivityList)
-        self.schedules = np.empty(self.params['popSize'], dtype=Schedule)
-        self.makespans = np.empty(self.params['popSize'], dtype=int)
+        self.ssgs = FastSSGS(self.problem)
+        self.batch_ssgs = BatchSSGS(self.problem)
+        # 'serial', 'parallel' or 'mixed' where each individual is decoded by PSGS with probability parallel_rate
+        self.psgs = PSGS(self.problem)
+        # 'double' for forward-backward improvement, 'right_shift' for Schedule.right_shift
+        self.justification = Justification(self.problem) if self.params['justification'] == 'double' else None
+        self.evaluator = None
+        if self.params['processes']:
+            self.evaluator = PoolEvaluator(self.problem, self.params['processes'], self.params['chunk_size'],
+                                           self.justification is not None)
+        # new activity lists are sampled uniformly or biased by priority rule 'mts' or 'grpw'
+        self.weights = None
+        if self.params['priority_rule'] is not None:
+            self.weights = priority_weights(self.problem, self.params['priority_rule'])
+        self.stats = self.params['stats']
+        self.cache = FitnessCache(self.params['cache_size']) if self.params['cache_size'] else None
+        # current and next generation live in preallocated matrices which are swapped in every step,
+        # activity lists are rows of int matrix and evaluated rows are written back in place
+        shape = (2, self.params['popSize'], self.problem.num_activities)
+        self._populations = np.zeros(shape, dtype=int)
+        self._start_times = np.zeros(shape, dtype=int)
+        self._makespans = np.zeros(shape[:2], dtype=int)
+        self._current = 0
+        # start times and makespans of decoding before justification
+        self._decoded_start_times = np.zeros(shape[1:], dtype=int)
+        self._decoded_makespans = np.zeros(shape[1], dtype=int)
+        self._rows = np.arange(self.params['popSize'])
         self.generated_schedules = 0
-        self._generate_new(self.population, self.params['popSize'])
+        self.generation = 0
+        self.stop_reason = None
+        if checkpoint is not None:
+            self._restore(checkpoint)
+            return
+        with self._phase('generate'):
+            self._generate_new(self.population)
+            # warm start replaces first random lists with given ones, e.g. from previous run,
+            # ActivityList checks they are precedence feasible
+            if self.params['warm_start'] is not None:
+                for i, array in enumerate(self.params['warm_start'][:self.params['popSize']]):
+                    self.population[i] = ActivityList(self.problem, array)._array
         self._evaluate_population()
+        if self.stats is not None:
+            self.stats.end_generation(self)
 
-    def _generate_new(self, population, size):
-        for i in xrange(size):
-            population[i] = ActivityList(self.problem).generate_random()
-
-    def _evaluate_population(self):
-        for index, al in enumerate(self.population):
-            schedule = self.ssgs.get_schedule(al)
-            self.generated_schedules += 1
-            self.rt.update(schedule)
-            schedule.right_shift()
-            self.generated_schedules += 1
-            self.schedules[index] = schedule
-            self.makespans[index] = schedule.makespan
-        for index, schedule in enumerate(self.schedules):
-            self.population[index] = schedule.serialize()
+    @property
+    def population(self):
+        return self._populations[self._current]
+
+    @property
+    def start_times(self):
+        return self._start_times[self._current]
+
+    @property
+    def makespans(self):
+        return self._makespans[self._current]
+
+    def _restore(self, checkpoint):
+        self.population[:] = checkpoint['population']
+        self.start_times[:] = checkpoint['start_times']
+        self.makespans[:] = checkpoint['makespans']
+        self.indices = np.argsort(self.makespans)
+        self.rt.merge(checkpoint['rt'])
+        self.generated_schedules = checkpoint['generated_schedules']
+        self.generation = checkpoint['generation']
+        restore_random_state(checkpoint)
+
+    def save(self, path):
+        save_checkpoint(self, path)
+
+    def _phase(self, name):
+        return self.stats.phase(name) if self.stats is not None else NULL_PHASE
+
+    def _generate_new(self, population):
+        population[:] = generate_population(self.problem, len(population), self.weights)
+
+    def _parallel_rows(self, size):
+        if self.params['sgs'] == 'parallel':
+            return np.ones(size, dtype=bool)
+        if self.params['sgs'] == 'mixed':
+            return np.random.random(size) < self.params['parallel_rate']
+        return np.zeros(size, dtype=bool)
+
+    def _evaluate_new(self, rows, bounds, parallel):
+        # given rows of current population are decoded, justified and written back in place together with their
+        # start times and makespans, bounds and parallel are vectors over the whole population,
+        # rows whose decoded makespan, before justification, can not get below their bound are rejected and get
+        # makespan -1, justification might still bring them below, so rejection is a heuristic
+        population = self.population
+        if self.evaluator is not None:
+            with self._phase('evaluate'):
+                results = self.evaluator.evaluate(population[rows], parallel[rows])
+            start_times, makespans = results[0], results[1]
+            accepted = rows
+        else:
+            with self._phase('decode'):
+                batch_ssgs = self.batch_ssgs if self.params['batch'] else None
+                decode_activity_lists(self.ssgs, population, batch_ssgs, self.psgs, parallel, bounds,
+                                      (self._decoded_start_times, self._decoded_makespans), rows)
+            accepted = rows[self._decoded_makespans[rows] >= 0]
+            start_times, makespans = self._decoded_start_times[accepted], self._decoded_makespans[accepted]
+        # activity positions are taken before population rows are replaced by their serialization
+        with self._phase('rt_update'):
+            self.rt.update_batch(start_times, start_times + self.problem.durations, makespans,
+                                 np.argsort(population[accepted], axis=1))
+        if self.evaluator is not None:
+            self.start_times[rows], self.makespans[rows], population[rows] = results[2:]
+        else:
+            with self._phase('justify'):
+                out = (self.start_times, self.makespans, population)
+                if self.justification is not None:
+                    justify_activity_lists(self.justification, self._decoded_start_times, out, accepted)
+                else:
+                    right_shift_activity_lists(self.ssgs, population, self._decoded_start_times, out, accepted)
+                self.makespans[rows[self._decoded_makespans[rows] < 0]] = -1
+        # decoding and justification, rejected rows are decoded only
+        self.generated_schedules += len(rows) + len(accepted)
+
+    def _evaluate(self, rows, bounds=None):
+        # decoder is drawn for every row before cache lookup, results of both decoders are cached separately
+        parallel = np.zeros(self.params['popSize'], dtype=bool)
+        parallel[rows] = self._parallel_rows(len(rows))
+        if self.cache is None:
+            self._evaluate_new(rows, bounds, parallel)
+            return
+        with self._phase('cache'):
+            values, missing = self.cache.lookup(self.population[rows], parallel[rows])
+            for row, value in zip(rows, values):
+                if value is not None:
+                    self.start_times[row], self.makespans[row], self.population[row] = value
+        if missing:
+            groups = [rows[indices] for indices in missing]
+            firsts = np.array([group[0] for group in groups])
+            # rows are replaced by their serialization, keys are kept aside
+            activity_lists = self.population[firsts]
+            if bounds is not None:
+                # duplicates may have different bounds, the loosest one keeps the result valid for all of them
+                bounds = bounds.copy()
+                bounds[firsts] = [bounds[group].max() for group in groups]
+            self._evaluate_new(firsts, bounds, parallel)
+            for activity_list, group in zip(activity_lists, groups):
+                first = group[0]
+                if self.makespans[first] >= 0:
+                    value = self.start_times[first].copy(), self.makespans[first], self.population[first].copy()
+                    self.cache.put(activity_list, value, parallel[first])
+                    # population keeps serialized list, so elite copies and unchanged children are found under it
+                    self.cache.put(value[2], value, parallel[first])
+                self.start_times[group[1:]] = self.start_times[first]
+                self.makespans[group[1:]] = self.makespans[first]
+                self.population[group[1:]] = self.population[first]
+
+    def _evaluate_population(self, fallbacks=None, previous=None):
+        # with fallbacks, individual whose decoding does not beat the worst previous one is replaced by the previous
+        # individual it comes from, previous is tuple of population, start times and makespans,
+        # individuals without fallback (-1) are never rejected
+        bounds = None
+        if fallbacks is not None:
+            bounds = np.where(fallbacks >= 0, previous[2].max(), np.iinfo(int).max)
+        self._evaluate(self._rows, bounds)
+        with self._phase('store'):
+            rejected = np.flatnonzero(self.makespans < 0)
+            if len(rejected):
+                sources = fallbacks[rejected]
+                self.population[rejected] = previous[0][sources]
+                self.start_times[rejected] = previous[1][sources]
+                self.makespans[rejected] = previous[2][sources]
+            self.indices = np.argsort(self.makespans)
+
+    def immigrate(self, activity_lists):
+        # replace the worst individuals with activity lists found elsewhere
+        indices = self.indices[::-1][:len(activity_lists)]
+        self.population[indices] = np.array(activity_lists, dtype=int)[:len(indices)]
+        self._evaluate(indices)
         self.indices = np.argsort(self.makespans)
 
+    def emigrants(self, count):
+        return list(self.population[self.indices[:count]])
+
     def _mutate(self):
-        num_mutate = self.params['Rmut'] * self.params['popSize']
-        mutants = np.random.choice(self.population, num_mutate, replace=False)
-        excluding_activities = self.rt.get_excluding_activities()
-        for al in mutants:
-            for act in excluding_activities:
-                al.shift(act, random.choice((ActivityList.LEFT_SHIFT, ActivityList.RIGHT_SHIFT)), self.params['dist'])
-        return mutants
-
-    def _crossover(self, newPopulation):
-        num_cross = int(self.params['Rcross'] * self.params['popSize'])
-        crossovers = np.empty(num_cross, dtype=ActivityList)
-        for i in range(num_cross):
-            if random.random() <= 0.3:
-                parent1 = random.choice(newPopulation)
-            else:
-                parent1 = random.choice(self.population)
-            parent2 = random.choice(self.population)
-            c1 = random.randint(0, self.problem.num_activities - 1)
-            c2 = random.randint(c1, self.problem.num_activities - 1)
-            crossovers[i] = parent1.crossover(parent2, c1, c2)
-        return crossovers
+        num_mutate = self.params['numRmut']
+        mutants = np.random.choice(len(self.population), num_mutate, replace=False)
+        excluding_activities = list(self.rt.get_excluding_activities())
+        directions = np.random.choice((ActivityList.LEFT_SHIFT, ActivityList.RIGHT_SHIFT),
+                                      (num_mutate, len(excluding_activities)))
+        shifted = shift_population(self.problem, self.population[mutants], excluding_activities, directions,
+                                   self.params['dist'])
+        return shifted, mutants
+
+    def _crossover(self, num_new, new_fallbacks):
+        # returns children and index of the current individual each of them comes from, -1 when there is none,
+        # parents are taken from current population and first num_new rows of the next one
+        num_cross = self.params['numRcross']
+        num_activities = self.problem.num_activities
+        size = self.params['popSize']
+        parents = np.random.randint(0, size, (num_cross, 2))
+        # first parent comes from new population with probability 0.3
+        from_new = np.random.random(num_cross) <= 0.3
+        if num_new:
+            parents[from_new, 0] = size + np.random.randint(0, num_new, np.count_nonzero(from_new))
+        else:
+            from_new[:] = False
+        c1 = np.random.randint(0, num_activities, num_cross)
+        c2 = c1 + (np.random.random(num_cross) * (num_activities - c1)).astype(int)
+        # rows of both generations in one matrix without copying them
+        populations = self._populations.reshape(-1, num_activities)
+        rows = np.where(parents < size, self._current * size + parents, (1 - self._current) * size + parents - size)
+        children = crossover_population(populations, rows, c1, c2)
+        fallbacks = parents[:, 0].copy()
+        fallbacks[from_new] = np.asarray(new_fallbacks, dtype=int)[fallbacks[from_new] - size]
+        return children, fallbacks
 
     def step(self):
-        newPopulation = np.empty((self.params['popSize']), dtype=ActivityList)
+        following = 1 - self._current
+        newPopulation = self._populations[following]
+        fallbacks = np.empty(self.params['popSize'], dtype=int)
+        fallbacks[:] = -1
         num_copy = self.params['numRcopy']
         num_new = self.params['numRnew']
         num_mut = self.params['numRmut']
         num_cross = self.params['numRcross']
         # copy best als to new population
+        offset = num_copy
         if num_copy > 0:
-            newPopulation[:num_copy] = self.population[self.indices][:num_copy]
-            offset = num_copy
+            newPopulation[:num_copy] = self.population[self.indices[:num_copy]]
+            fallbacks[:num_copy] = self.indices[:num_copy]
         # generate new
         if num_new > 0:
-            self._generate_new(newPopulation[offset:offset+num_new], num_new)
+            with self._phase('generate'):
+                self._generate_new(newPopulation[offset:offset+num_new])
             offset += num_new
         # mutation
         if num_mut > 0:
-            newPopulation[offset:offset+num_mut] = self._mutate()
+            with self._phase('mutate'):
+                newPopulation[offset:offset+num_mut], fallbacks[offset:offset+num_mut] = self._mutate()
             offset += num_mut
         # crossover
         if num_cross > 0:
-            newPopulation[offset:offset+num_cross] = self._crossover(newPopulation[:offset])
+            with self._phase('crossover'):
+                newPopulation[offset:offset+num_cross], fallbacks[offset:offset+num_cross] = \
+                    self._crossover(offset, fallbacks[:offset])
+        # current generation stays untouched in the other buffers until the next step
+        previous = (self.population, self.start_times, self.makespans)
         #replace population with newPopulation
-        self.population = newPopulation
+        self._current = following
         #evaluate
-        self._evaluate_population()
+        self._evaluate_population(fallbacks if self.params['reject'] else None, previous)
+        self.generation += 1
+        if self.stats is not None:
+            self.stats.end_generation(self)
 
     @property
     def best(self):
-        return self.schedules[self.indices][0]
+        index = self.indices[0]
+        # copies, rows are overwritten by following generations
+        return LazySchedule(self.problem, self.population[index].copy(), self.start_times[index].copy(),
+                            int(self.makespans[index]))
 
-    def run(self):
-        while self.generated_schedules < self.params['schedule_limit']:
-            self.step()
+    @property
+    def best_makespan(self):
+        return int(self.makespans[self.indices[0]])
 
+    @property
+    def gap(self):
+        # relative distance of best makespan from problem lower bound, 0 means proven optimum
+        return (self.best_makespan - self.problem.lower_bound) / float(self.problem.lower_bound)
 
+    def _stop_reason(self, elapsed, stagnant):
+        # time_limit in seconds since construction, stagnation in generations without improvement
+        if self.params['stop_at_lower_bound'] and self.best_makespan <= self.problem.lower_bound:
+            return 'lower_bound'
+        if self.generated_schedules >= self.params['schedule_limit']:
+            return 'schedule_limit'
+        if self.params['time_limit'] is not None and elapsed >= self.params['time_limit']:
+            return 'time_limit'
+        if self.params['target_makespan'] is not None and self.best_makespan <= self.params['target_makespan']:
+            return 'target_makespan'
+        if self.params['stagnation'] is not None and stagnant >= self.params['stagnation']:
+            return 'stagnation'
+        return None
 
+    def iterate(self):
+        # yields progress after initial population and every generation until a stopping criterion is met
+        best_makespan = self.best_makespan
+        stagnant = 0
+        while True:
+            elapsed = time.time() - self.start_time
+            yield {'generation': self.generation,
+                   'best_makespan': self.best_makespan,
+                   'generated_schedules': self.generated_schedules,
+                   'gap': self.gap,
+                   'elapsed': elapsed}
+            self.stop_reason = self._stop_reason(elapsed, stagnant)
+            if self.stop_reason is not None:
+                if self.params['checkpoint'] is not None:
+                    self.save(self.params['checkpoint'])
+                return
+            self.step()
+            if self.params['checkpoint'] is not None and self.generation % self.params['checkpoint_interval'] == 0:
+                self.save(self.params['checkpoint'])
+            if self.best_makespan < best_makespan:
+                best_makespan = self.best_makespan
+                stagnant = 0
+            else:
+                stagnant += 1
+
+    def run(self):
+        for progress in self.iterate():
+            pass
+        return self.best
 
+    def close(self):
+        if self.evaluator is not None:
+            self.evaluator.close()
+            self.evaluator = None
 
 
+def solve(problem, seed=None, **params):
+    # one GARTH run with both random generators seeded, shared by benchmark, batch and task workers,
+    # returns the solver together with result dict
+    if seed is not None:
+        random.seed(seed)
+        np.random.seed(seed)
+    start = time.time()
+    g = GARTH(problem, **params)
+    best = g.run()
+    return g, {'seed': seed,
+               'makespan': best.makespan,
+               'lower_bound': problem.lower_bound,
+               'gap': g.gap,
+               'stop_reason': g.stop_reason,
+               'schedules': g.generated_schedules,
+               'wall_time': time.time() - start,
+               'start_times': best.start_times_array.tolist()}
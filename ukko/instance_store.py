@@ -0,0 +1,107 @@
+#!/usr/bin/env python2.7
+# -*- coding: utf-8 -*-
+import argparse
+import glob
+import json
+import os.path
+
+import numpy as np
+
+from rcpparser import RCPParser
+from problem import Problem
+
+ARRAYS = ('offsets', 'durations', 'demands', 'constraints', 'edges', 'closures')
+# columns of offsets, each row is one instance and the last row closes the previous one
+ACTIVITIES, DEMANDS, CONSTRAINTS, EDGES, CLOSURES = range(5)
+
+
+def compile_store(file_paths, store_path):
+    # file_paths is directory with .RCP files or list of them
+    if isinstance(file_paths, basestring):
+        file_paths = sorted(glob.glob(os.path.join(file_paths, '*.RCP')))
+    parser = RCPParser()
+    names = []
+    offsets = np.zeros((len(file_paths) + 1, 5), dtype=np.int64)
+    durations, demands, constraints, edges, closures = [], [], [], [], []
+    for index, file_path in enumerate(file_paths):
+        problem = Problem(parser(file_path))
+        closure = np.packbits(problem.closure)
+        names.append(os.path.basename(file_path))
+        durations.append(problem.durations)
+        demands.append(problem.res_demands.ravel())
+        constraints.append(problem.res_constraints.ravel())
+        edges.append(problem.edges)
+        closures.append(closure)
+        offsets[index + 1] = offsets[index] + (problem.num_activities, problem.res_demands.size,
+                                               problem.num_resources, len(problem.edges), closure.size)
+    if not os.path.isdir(store_path):
+        os.makedirs(store_path)
+    arrays = {'offsets': offsets,
+              'durations': np.concatenate(durations).astype(np.int32),
+              'demands': np.concatenate(demands).astype(np.int32),
+              'constraints': np.concatenate(constraints).astype(np.int32),
+              'edges': np.concatenate(edges).astype(np.int32),
+              'closures': np.concatenate(closures)}
+    for name in ARRAYS:
+        np.save(os.path.join(store_path, name + '.npy'), arrays[name])
+    with open(os.path.join(store_path, 'names.json'), 'w') as f:
+        json.dump(names, f)
+    return InstanceStore(store_path)
+
+
+class InstanceStore(object):
+
+    def __init__(self, store_path):
+        self.store_path = store_path
+        with open(os.path.join(store_path, 'names.json')) as f:
+            self.names = json.load(f)
+        self.index = {name: index for index, name in enumerate(self.names)}
+        for name in ARRAYS:
+            setattr(self, name, np.load(os.path.join(store_path, name + '.npy'), mmap_mode='r'))
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self.index
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def _slice(self, array, index, column):
+        return array[self.offsets[index, column]:self.offsets[index + 1, column]]
+
+    def problem_dict(self, name):
+        index = self.index[os.path.basename(name)]
+        num_activities = int(self.offsets[index + 1, ACTIVITIES] - self.offsets[index, ACTIVITIES])
+        num_resources = int(self.offsets[index + 1, CONSTRAINTS] - self.offsets[index, CONSTRAINTS])
+        closure = np.unpackbits(self._slice(self.closures, index, CLOSURES))
+        return {'num_activities': num_activities,
+                'num_resources': num_resources,
+                'res_constraints': np.array(self._slice(self.constraints, index, CONSTRAINTS),
+                                            dtype=np.int, ndmin=2).T,
+                'activities': {'duration': np.array(self._slice(self.durations, index, ACTIVITIES), dtype=np.int),
+                               'res_demands': np.array(self._slice(self.demands, index, DEMANDS),
+                                                       dtype=np.int).reshape(num_resources, num_activities)},
+                'edges': [tuple(edge) for edge in self._slice(self.edges, index, EDGES).tolist()],
+                'closure': closure[:num_activities ** 2].reshape(num_activities, num_activities).astype(bool)}
+
+    def problem(self, name):
+        return Problem(self.problem_dict(name))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Compile directory of RCP files into binary instance store')
+    parser.add_argument('input', help='Directory with .RCP files')
+    parser.add_argument('output', help='Directory of compiled store')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    store = compile_store(args.input, args.output)
+    print 'Compiled {0} instances into {1}'.format(len(store), args.output)
+
+
+if __name__ == '__main__':
+    main()
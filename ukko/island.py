@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+
+import multiprocessing
+import random
+import time
+
+import numpy as np
+
+from problem import Problem
+from garth import GARTH
+from schedule import LazySchedule
+
+
+def _island_worker(problem_dict, params, seed, connection, counter):
+    random.seed(seed)
+    np.random.seed(seed)
+    g = GARTH(Problem(problem_dict), **params)
+    with counter.get_lock():
+        counter.value += g.generated_schedules
+    while True:
+        message = connection.recv()
+        if message is None:
+            break
+        generations, immigrants, rt_arrays = message
+        if rt_arrays is not None:
+            g.rt.merge(rt_arrays)
+        if immigrants:
+            before = g.generated_schedules
+            g.immigrate(immigrants)
+            with counter.get_lock():
+                counter.value += g.generated_schedules - before
+        for generation in xrange(generations):
+            if counter.value >= params['schedule_limit']:
+                break
+            if params['time_limit'] is not None and time.time() - g.start_time >= params['time_limit']:
+                break
+            if params['stop_at_lower_bound'] and g.best_makespan <= g.problem.lower_bound:
+                break
+            before = g.generated_schedules
+            g.step()
+            with counter.get_lock():
+                counter.value += g.generated_schedules - before
+        best = g.best
+        connection.send((g.emigrants(params['migrants']), g.rt.get_arrays(),
+                         best.makespan, best.activity_list, best.start_times_array))
+    connection.close()
+
+
+class IslandGARTH(object):
+    def __init__(self, problem, **kwargs):
+        self.problem = problem
+        self.params = {'islands': multiprocessing.cpu_count(),
+                       'migration_interval': 5,
+                       'migrants': 2,
+                       'seed': None,
+                       'schedule_limit': 5000,
+                       'time_limit': None,
+                       'target_makespan': None,
+                       'stagnation': None,
+                       'stop_at_lower_bound': True}
+        self.params.update(kwargs)
+        self.generated_schedules = 0
+        self.best_makespan = None
+        self.stop_reason = None
+        self._best = None
+
+    def _stop_reason(self, elapsed, stagnant, generated_schedules):
+        # same criteria as GARTH.iterate, checked after every migration, stagnation in generations of one island
+        if self.params['stop_at_lower_bound'] and self.best_makespan <= self.problem.lower_bound:
+            return 'lower_bound'
+        if generated_schedules >= self.params['schedule_limit']:
+            return 'schedule_limit'
+        if self.params['time_limit'] is not None and elapsed >= self.params['time_limit']:
+            return 'time_limit'
+        if self.params['target_makespan'] is not None and self.best_makespan <= self.params['target_makespan']:
+            return 'target_makespan'
+        if self.params['stagnation'] is not None and stagnant >= self.params['stagnation']:
+            return 'stagnation'
+        return None
+
+    def run(self):
+        start = time.time()
+        seed = self.params['seed'] if self.params['seed'] is not None else random.randint(0, 2 ** 30)
+        counter = multiprocessing.Value('l', 0)
+        connections = []
+        processes = []
+        for island in xrange(self.params['islands']):
+            parent_connection, child_connection = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=_island_worker,
+                                              args=(self.problem.problem_dict, self.params, seed + island,
+                                                    child_connection, counter))
+            process.daemon = True
+            process.start()
+            connections.append(parent_connection)
+            processes.append(process)
+        immigrants = [None] * len(connections)
+        rt_arrays = None
+        stagnant = 0
+        try:
+            while True:
+                for connection, island_immigrants in zip(connections, immigrants):
+                    connection.send((self.params['migration_interval'], island_immigrants, rt_arrays))
+                results = [connection.recv() for connection in connections]
+                stagnant += self.params['migration_interval']
+                for emigrants, arrays, makespan, activity_list, start_times in results:
+                    if self.best_makespan is None or makespan < self.best_makespan:
+                        self.best_makespan = makespan
+                        self._best = (activity_list, start_times)
+                        stagnant = 0
+                # ring topology, island i receives the best lists of island i - 1
+                immigrants = [results[island - 1][0] for island in xrange(len(results))]
+                rt_arrays = [np.minimum.reduce([result[1][index] for result in results])
+                             for index in xrange(len(results[0][1]))]
+                self.stop_reason = self._stop_reason(time.time() - start, stagnant, counter.value)
+                if self.stop_reason is not None:
+                    break
+        finally:
+            for connection in connections:
+                connection.send(None)
+            for process in processes:
+                process.join()
+        self.generated_schedules = counter.value
+
+    @property
+    def best(self):
+        activity_list, start_times = self._best
+        return LazySchedule(self.problem, activity_list, start_times, self.best_makespan)
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+
+class Justification(object):
+    # forward-backward improvement of a schedule given by start times, works on a resource profile kept in lists,
+    # scanning few periods of few resources in Python is cheaper than slicing numpy array for each activity
+
+    def __init__(self, problem):
+        self.problem = problem
+        self.durations = problem.durations
+        self.horizon = int(self.durations.sum())
+        self._durations = self.durations.tolist()
+        self._predecessors = [predecessors.tolist() for predecessors in problem.predecessor_arrays]
+        self._successors = [successors.tolist() for successors in problem.successor_arrays]
+        # only resources the activity really demands are checked
+        self._usages = [[(resource, int(demand)) for resource, demand in enumerate(problem.demands(activity)) if demand]
+                        for activity in xrange(problem.num_activities)]
+        self._earliest_starts = problem.earliest_starts.tolist()
+        self.rank = np.empty(problem.num_activities, dtype=int)
+        self.rank[problem.topological_order()] = np.arange(problem.num_activities)
+        self._free = [[int(constraint)] * (self.horizon + 1) for constraint in problem.res_constraints[:, 0]]
+        self._capacity = [list(row) for row in self._free]
+
+    def _fill_capacity(self, start_times):
+        # rows are reset in place, profile is not allocated again for every schedule
+        capacity = self._capacity
+        for row, free in zip(capacity, self._free):
+            row[:] = free
+        for activity, start_time in enumerate(start_times):
+            finish_time = start_time + self._durations[activity]
+            for resource, demand in self._usages[activity]:
+                row = capacity[resource]
+                for period in xrange(start_time, finish_time):
+                    row[period] -= demand
+
+    def _move(self, activity, start_time, new_start_time):
+        # periods covered by both positions stay as they are
+        duration = self._durations[activity]
+        if new_start_time > start_time:
+            released = xrange(start_time, min(new_start_time, start_time + duration))
+            taken = xrange(max(new_start_time, start_time + duration), new_start_time + duration)
+        else:
+            released = xrange(max(start_time, new_start_time + duration), start_time + duration)
+            taken = xrange(new_start_time, min(start_time, new_start_time + duration))
+        for resource, demand in self._usages[activity]:
+            row = self._capacity[resource]
+            for period in released:
+                row[period] += demand
+            for period in taken:
+                row[period] -= demand
+
+    def _latest_start(self, activity, start_time, t):
+        # latest start between start_time and t, periods of activity itself count as free
+        duration = self._durations[activity]
+        rows = [(self._capacity[resource], demand) for resource, demand in self._usages[activity]]
+        finish_time = start_time + duration
+        length = 0
+        period = t + duration - 1
+        while period >= finish_time:
+            for row, demand in rows:
+                if row[period] < demand:
+                    length = 0
+                    break
+            else:
+                length += 1
+                if length == duration:
+                    return period
+            period -= 1
+        # window overlapping current position, its own periods are free
+        return start_time + length
+
+    def _earliest_start(self, activity, start_time, t):
+        # earliest start between t and start_time, periods of activity itself count as free
+        duration = self._durations[activity]
+        rows = [(self._capacity[resource], demand) for resource, demand in self._usages[activity]]
+        length = 0
+        period = t
+        while period < start_time:
+            for row, demand in rows:
+                if row[period] < demand:
+                    length = 0
+                    break
+            else:
+                length += 1
+                if length == duration:
+                    return period - duration + 1
+            period += 1
+        return start_time - length
+
+    def right_justify(self, start_times, makespan=None):
+        start_times = [int(start_time) for start_time in start_times]
+        finish_times = [start_time + duration for start_time, duration in zip(start_times, self._durations)]
+        if makespan is None:
+            makespan = max(finish_times)
+        self._fill_capacity(start_times)
+        latest_starts = self.problem.latest_starts(makespan).tolist()
+        # latest finishing first, successors before predecessors on ties
+        for activity in np.lexsort((-self.rank, -np.array(finish_times))).tolist():
+            start_time = start_times[activity]
+            # activity on a critical path to the end can not move
+            if start_time == latest_starts[activity]:
+                continue
+            t = latest_starts[activity]
+            for successor in self._successors[activity]:
+                if start_times[successor] - self._durations[activity] < t:
+                    t = start_times[successor] - self._durations[activity]
+            if t == start_time:
+                continue
+            if self._usages[activity] and self._durations[activity]:
+                t = self._latest_start(activity, start_time, t)
+                if t == start_time:
+                    continue
+                self._move(activity, start_time, t)
+            start_times[activity] = t
+            finish_times[activity] = t + self._durations[activity]
+        return np.array(start_times, dtype=int), makespan
+
+    def left_justify(self, start_times, fill_capacity=True):
+        start_times = [int(start_time) for start_time in start_times]
+        finish_times = [start_time + duration for start_time, duration in zip(start_times, self._durations)]
+        if fill_capacity:
+            self._fill_capacity(start_times)
+        earliest_starts = self._earliest_starts
+        # earliest starting first, predecessors before successors on ties
+        for activity in np.lexsort((self.rank, np.array(start_times))).tolist():
+            start_time = start_times[activity]
+            if start_time == earliest_starts[activity]:
+                continue
+            t = 0
+            for predecessor in self._predecessors[activity]:
+                if finish_times[predecessor] > t:
+                    t = finish_times[predecessor]
+            if t == start_time:
+                continue
+            if self._usages[activity] and self._durations[activity]:
+                t = self._earliest_start(activity, start_time, t)
+                if t == start_time:
+                    continue
+                self._move(activity, start_time, t)
+            start_times[activity] = t
+            finish_times[activity] = t + self._durations[activity]
+        return np.array(start_times, dtype=int), max(finish_times)
+
+    def activity_order(self, start_times):
+        return np.lexsort((self.rank, start_times))
+
+    def justify(self, start_times):
+        # right justification followed by left justification, returns start times, makespan and activity order
+        start_times, makespan = self.right_justify(start_times)
+        start_times, makespan = self.left_justify(start_times, fill_capacity=False)
+        return start_times, makespan, self.activity_order(start_times)
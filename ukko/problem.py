@@ -1,7 +1,5 @@
 # -*- coding: utf-8 -*-
 
-import igraph
-from utils import memoized
 import numpy as np
 
 
@@ -9,36 +7,137 @@ class Problem(object):
 
     def __init__(self, problem_dict):
         self.problem_dict = problem_dict
-        graph_attrs = {'num_resources': self.problem_dict['num_resources'],
-                       'res_constraints': self.problem_dict['res_constraints']}
-        vertex_attrs = {'duration': self.problem_dict['activities']['duration'],
-                        'res_demands': self.problem_dict['activities']['res_demands'].T.tolist()}
-        self.graph = igraph.Graph(n=self.problem_dict['num_activities'],
-                                  directed=True,
-                                  edges=self.problem_dict['edges'],
-                                  vertex_attrs=vertex_attrs,
-                                  graph_attrs=graph_attrs)
-
-    @memoized
+        self._graph = None
+        self._compile()
+
+    @property
+    def graph(self):
+        # igraph is only needed for inspection, compiled arrays below answer all queries
+        if self._graph is None:
+            import igraph
+            graph_attrs = {'num_resources': self.problem_dict['num_resources'],
+                           'res_constraints': self.problem_dict['res_constraints']}
+            vertex_attrs = {'duration': self.problem_dict['activities']['duration'],
+                            'res_demands': self.problem_dict['activities']['res_demands'].T.tolist()}
+            self._graph = igraph.Graph(n=self.problem_dict['num_activities'],
+                                       directed=True,
+                                       edges=self.problem_dict['edges'],
+                                       vertex_attrs=vertex_attrs,
+                                       graph_attrs=graph_attrs)
+        return self._graph
+
+    def _compile(self):
+        num_activities = self.num_activities
+        # views, arrays of problem_dict (e.g. shared memory of pool workers) are not copied
+        self.durations = np.asarray(self.activities['duration'], dtype=int).view()
+        self.res_demands = np.asarray(self.activities['res_demands'], dtype=int).view()
+        self.edges = np.asarray(self.problem_dict['edges'], dtype=int).reshape(-1, 2).view()
+        # predecessor_mask[b, a] is True when a is direct predecessor of b
+        self.predecessor_mask = np.zeros((num_activities, num_activities), dtype=bool)
+        self.predecessor_mask[self.edges[:, 1], self.edges[:, 0]] = True
+        self.predecessor_indptr, self.predecessor_indices = self._csr(self.predecessor_mask)
+        self.successor_indptr, self.successor_indices = self._csr(self.predecessor_mask.T)
+        self.predecessor_arrays = [self.predecessor_indices[self.predecessor_indptr[activity]:
+                                                            self.predecessor_indptr[activity + 1]]
+                                   for activity in xrange(num_activities)]
+        self.successor_arrays = [self.successor_indices[self.successor_indptr[activity]:
+                                                        self.successor_indptr[activity + 1]]
+                                 for activity in xrange(num_activities)]
+        # closure[a, b] is True when a has to be finished before b starts
+        if 'closure' in self.problem_dict:
+            self.closure = np.asarray(self.problem_dict['closure'], dtype=bool).view()
+        else:
+            self.closure = self._compute_closure()
+        for array in (self.durations, self.res_demands, self.edges, self.predecessor_mask, self.closure,
+                      self.predecessor_indptr, self.predecessor_indices,
+                      self.successor_indptr, self.successor_indices):
+            array.flags.writeable = False
+        # per instance caches of frequently requested python objects
+        self._predecessors = [set(predecessors.tolist()) for predecessors in self.predecessor_arrays]
+        self._successors = [set(successors.tolist()) for successors in self.successor_arrays]
+        self._durations = self.durations.tolist()
+        self._demands = [self.res_demands[:, activity, np.newaxis] for activity in xrange(num_activities)]
+        # earliest start of every activity and longest path from its start to the end of project
+        self.earliest_starts, self.tails = self._time_windows()
+        for array in (self.earliest_starts, self.tails):
+            array.flags.writeable = False
+        self.lower_bound = max(self.critical_path_length(), self.resource_lower_bound(),
+                               self.disjunctive_lower_bound())
+
+    def _compute_closure(self):
+        closure = np.zeros((self.num_activities, self.num_activities), dtype=bool)
+        for activity in self.topological_order():
+            for predecessor in self.predecessor_arrays[activity]:
+                closure[:, activity] |= closure[:, predecessor]
+                closure[predecessor, activity] = True
+        return closure
+
+    @staticmethod
+    def _csr(mask):
+        rows, columns = np.nonzero(mask)
+        indptr = np.zeros(mask.shape[0] + 1, dtype=int)
+        np.cumsum(np.bincount(rows, minlength=mask.shape[0]), out=indptr[1:])
+        return indptr, columns.astype(int)
+
+    def topological_order(self):
+        num_predecessors = self.predecessor_mask.sum(axis=1).tolist()
+        order = [activity for activity in xrange(self.num_activities) if num_predecessors[activity] == 0]
+        for activity in order:
+            for successor in self.successor_arrays[activity]:
+                num_predecessors[successor] -= 1
+                if num_predecessors[successor] == 0:
+                    order.append(successor)
+        return order
+
+    def _time_windows(self):
+        order = self.topological_order()
+        earliest_starts = np.zeros(self.num_activities, dtype=int)
+        tails = np.zeros(self.num_activities, dtype=int)
+        for activity in order:
+            predecessors = self.predecessor_arrays[activity]
+            if len(predecessors):
+                earliest_starts[activity] = (earliest_starts[predecessors] + self.durations[predecessors]).max()
+        for activity in reversed(order):
+            successors = self.successor_arrays[activity]
+            tails[activity] = self.durations[activity] + (tails[successors].max() if len(successors) else 0)
+        return earliest_starts, tails
+
+    def latest_starts(self, horizon):
+        # latest start times which still allow finishing the project by horizon
+        return horizon - self.tails
+
+    def critical_path_length(self):
+        return int((self.earliest_starts + self.durations).max())
+
+    def resource_lower_bound(self):
+        # total work on every resource divided by its capacity
+        work = np.dot(self.res_demands, self.durations)
+        capacities = self.res_constraints[:, 0]
+        return int(max((-(-work // capacities)).tolist() + [0]))
+
+    def disjunctive_lower_bound(self):
+        # activities demanding more than half of some resource can not overlap
+        capacities = self.res_constraints[:, 0]
+        return int(max([self.durations[2 * demands > capacity].sum()
+                         for demands, capacity in zip(self.res_demands, capacities)] + [0]))
+
     def predecessors(self, activity):
-        return set(self.graph.predecessors(activity))
+        return self._predecessors[activity]
 
-    @memoized
     def successors(self, activity):
-        return set(self.graph.successors(activity))
+        return self._successors[activity]
 
-    @memoized
     def predecessors_all(self, activity):
-        predecessors = set(self.predecessors(activity))
-        result = predecessors.copy()
-        for predecessor in predecessors:
-            result.update(self.predecessors_all(predecessor))
-        return result
+        return set(np.flatnonzero(self.closure[:, activity]).tolist())
 
     def contains_all_predecessors(self, container, activity):
         act_predecessors = self.predecessors(activity)
         return container.intersection(act_predecessors) == act_predecessors
 
+    def contains_all_predecessors_mask(self, mask, activities):
+        # mask is boolean vector (or matrix with one row per activity) of contained activities
+        return ~np.any(self.predecessor_mask[activities] & ~mask, axis=-1)
+
     @property
     def num_activities(self):
         return self.problem_dict['num_activities']
@@ -55,10 +154,8 @@ class Problem(object):
     def activities(self):
         return self.problem_dict['activities']
 
-    @memoized
     def duration(self, activity):
-        return self.activities['duration'][activity]
+        return self._durations[activity]
 
-    @memoized
     def demands(self, activity):
-        return self.activities['res_demands'][:, activity, np.newaxis]
+        return self._demands[activity]
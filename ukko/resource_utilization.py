@@ -11,6 +11,9 @@ class ResourceUtilization(object):
         self.max_makespan = max_makespan
         self.utilization = np.zeros([self.num_resources, max_makespan], dtype=np.int)
 
+    def reset(self):
+        self.utilization[:] = 0
+
     def add(self, demands, start_time, finish_time):
         if finish_time > self.max_makespan:
             self.extend_makespan(finish_time)
@@ -21,7 +24,7 @@ class ResourceUtilization(object):
 
     def extend_makespan(self, minimal_extend_time):
         if minimal_extend_time > self.max_makespan:
-            difference = self.max_makespan * math.floor(minimal_extend_time / self.max_makespan)
+            difference = self.max_makespan * int(math.floor(minimal_extend_time / self.max_makespan))
             extension = np.zeros([self.num_resources, difference], dtype=np.int)
             self.utilization = np.hstack((self.utilization, extension))
             self.max_makespan += difference
@@ -33,4 +36,33 @@ class ResourceUtilization(object):
         return self.res_constraints[resource] - self.get(resource, time)
 
     def is_free(self, demands, start_time, finish_time):
-        return np.all(self.utilization[:, start_time:finish_time] + demands <= self.res_constraints)
\ No newline at end of file
+        return np.all(self.utilization[:, start_time:finish_time] + demands <= self.res_constraints)
+
+    def _fitting_starts(self, demands, earliest, latest, duration):
+        # starts between earliest and latest where demands fit for duration periods, periods after the end of
+        # utilization array are free
+        if latest < earliest:
+            return np.zeros(0, dtype=int)
+        overload = np.any(self.utilization[:, earliest:latest + duration] + demands > self.res_constraints, axis=0)
+        overload = np.concatenate((overload, np.zeros(latest + duration - earliest - len(overload), dtype=bool)))
+        blocked = np.concatenate(([0], np.cumsum(overload)))
+        starts = np.arange(latest - earliest + 1)
+        return earliest + np.flatnonzero(blocked[starts + duration] == blocked[starts])
+
+    def earliest_start(self, demands, time, duration, latest=None):
+        # earliest start >= time (and <= latest) where demands fit for duration periods, None if they never fit
+        if duration == 0:
+            return time
+        if np.any(demands > self.res_constraints):
+            return None
+        if latest is None:
+            latest = max(time, self.max_makespan)
+        feasible = self._fitting_starts(demands, time, latest, duration)
+        return int(feasible[0]) if len(feasible) else None
+
+    def latest_start(self, demands, time, duration, earliest=0):
+        # latest start <= time (and >= earliest) where demands fit for duration periods, None if there is none
+        if duration == 0:
+            return time
+        feasible = self._fitting_starts(demands, earliest, time, duration)
+        return int(feasible[-1]) if len(feasible) else None
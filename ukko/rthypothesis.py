@@ -1,7 +1,6 @@
 # -*- coding: utf-8 -*-
 
 import numpy as np
-from itertools import combinations, product
 
 
 class RTHypothesis(object):
@@ -16,50 +15,74 @@ class RTHypothesis(object):
         self.characteristic = characteristic
         self._array = np.empty((self.problem.num_activities, self.problem.num_activities), dtype=int)
         self._array[:, :] = self.INFINITY
+        # largest finite value of matrix and cells holding it, kept up to date as updates arrive
+        self._max = 0
+        self._excluding = set()
 
     def __getitem__(self, item):
         return self._array[item]
 
     def update(self, schedule):
+        start_times = np.zeros(self.problem.num_activities, dtype=int)
+        finish_times = np.zeros(self.problem.num_activities, dtype=int)
+        orders = np.zeros(self.problem.num_activities, dtype=int)
+        order = 0
+        for start_time, activities in sorted(schedule.start_times.items()):
+            for activity in activities:
+                start_times[activity] = start_time
+                finish_times[activity] = schedule.finish_times_activities[activity]
+                orders[activity] = order
+                order += 1
+        self.update_batch(start_times[np.newaxis], finish_times[np.newaxis], [schedule.makespan],
+                          orders[np.newaxis])
+
+    def update_batch(self, start_times, finish_times, makespans, orders):
+        # one row per schedule, orders break ties between activities starting at the same time
+        start_times = np.asarray(start_times)
+        finish_times = np.asarray(finish_times)
+        makespans = np.asarray(makespans)
+        orders = np.asarray(orders)
+        for makespan in np.unique(makespans):
+            group = makespans == makespan
+            mask = self._pairs(start_times[group], finish_times[group], orders[group]).any(axis=0)
+            mask &= self._array > makespan
+            if mask.any():
+                self._lower(mask, makespan)
+
+    def merge(self, array):
+        mask = array < self._array
+        if mask.any():
+            self._lower(mask, array[mask])
+
+    def _lower(self, mask, values):
+        # values are lower than cells of mask, matrix is rescanned later only when all cells of maximum were lowered
+        self._array[mask] = values
+        if self._max is None:
+            return
+        self._excluding = set(cell for cell in self._excluding if not mask[cell])
+        top = np.max(values)
+        if top > self._max:
+            self._max = top
+            self._excluding = set()
+        if top == self._max:
+            self._excluding.update(tuple(cell) for cell in np.argwhere(mask & (self._array == top)).tolist())
+        if not self._excluding:
+            self._max = None
+
+    def _pairs(self, start_times, finish_times, orders):
         if self.characteristic == self.PSE:
-            self._update_PSE(schedule)
+            return ((start_times[:, :, np.newaxis] == start_times[:, np.newaxis, :]) &
+                    (orders[:, :, np.newaxis] < orders[:, np.newaxis, :]))
         elif self.characteristic == self.FLE:
-            self._update_FLE(schedule)
+            return finish_times[:, :, np.newaxis] <= finish_times[:, np.newaxis, :]
         elif self.characteristic == self.SLT:
-            self._update_SLT(schedule)
+            return start_times[:, :, np.newaxis] < start_times[:, np.newaxis, :]
 
     def get_excluding(self):
-        result = []
-        max_time = self._array[self._array < self.INFINITY].max()
-        activities = np.argwhere(self._array == max_time)
-        for couple in activities:
-            result.append(tuple(couple))
-        return result
-
-    def _update_PSE(self, schedule):
-        makespan = schedule.makespan
-        for activities in schedule.start_times.values():
-            for couple in combinations(activities, 2):
-                if self._array[couple] > makespan:
-                    self._array[couple] = makespan
-
-    def _update_FLE(self, schedule):
-        makespan = schedule.makespan
-        previous_activities = set()
-        for activities in schedule.finish_times.values():
-            previous_activities.update(activities)
-            for couple in product(previous_activities, activities):
-                if self._array[couple] > makespan:
-                    self._array[couple] = makespan
-
-    def _update_SLT(self, schedule):
-        makespan = schedule.makespan
-        previous_activities = set()
-        for activities in schedule.start_times.values():
-            for couple in product(previous_activities, activities):
-                if self._array[couple] > makespan:
-                    self._array[couple] = makespan
-            previous_activities.update(activities)
+        if self._max is None:
+            self._max = self._array[self._array < self.INFINITY].max()
+            self._excluding = set(tuple(cell) for cell in np.argwhere(self._array == self._max).tolist())
+        return sorted(self._excluding)
 
     def __str__(self):
         if self.characteristic == self.PSE:
@@ -93,6 +116,17 @@ class RTSystem(object):
         for rt in self._rts:
             rt.update(schedule)
 
+    def update_batch(self, start_times, finish_times, makespans, orders):
+        for rt in self._rts:
+            rt.update_batch(start_times, finish_times, makespans, orders)
+
+    def get_arrays(self):
+        return [rt._array.copy() for rt in self._rts]
+
+    def merge(self, arrays):
+        for rt, array in zip(self._rts, arrays):
+            rt.merge(array)
+
     def __str__(self):
         return '\n'.join(map(str, self._rts))
 
@@ -2,6 +2,8 @@
 
 from __future__ import division
 
+import bisect
+
 import numpy as np
 
 from resource_utilization import ResourceUtilization
@@ -13,14 +15,31 @@ class Schedule(object):
     RIGHT_SHIFT = 1
     LEFT_SHIFT = -1
 
+    __slots__ = ('problem', 'start_times', 'finish_times', 'res_utilization', 'scheduled_activities',
+                 'finish_times_activities', 'start_times_activities', '_makespan')
+
     def __init__(self, problem):
         self.problem = problem
         self.start_times = dict()
         self.finish_times = dict()
-        self.res_utilization = ResourceUtilization(problem.res_constraints, problem.num_resources, 64)
+        # no schedule is longer than sum of all durations, so utilization never has to grow
+        self.res_utilization = ResourceUtilization(problem.res_constraints, problem.num_resources,
+                                                   int(problem.durations.sum()) + 1)
         self.scheduled_activities = set()
         self.finish_times_activities = dict()
         self.start_times_activities = dict()
+        # finish times are never deleted from the dict, so the latest one only grows
+        self._makespan = 0
+
+    def reset(self):
+        # empties schedule while keeping its preallocated resource utilization for reuse
+        self.start_times.clear()
+        self.finish_times.clear()
+        self.res_utilization.reset()
+        self.scheduled_activities.clear()
+        self.finish_times_activities.clear()
+        self.start_times_activities.clear()
+        self._makespan = 0
 
     def _add_to_list(self, activity, l, time):
         try:
@@ -37,6 +56,8 @@ class Schedule(object):
             self.scheduled_activities.add(activity)
             self.finish_times_activities[activity] = finish_time
             self.start_times_activities[activity] = start_time
+            if finish_time > self._makespan:
+                self._makespan = finish_time
         else:
             raise ConstraintException('Activity {0} cannot be placed at time {1} because of constraints'.format(activity, start_time))
 
@@ -61,8 +82,7 @@ class Schedule(object):
             return False
         elif skip_check_precedence:
             return True
-        precedence = self.problem.contains_all_predecessors(self._finished_activities(start_time), activity)
-        return res_free and precedence
+        return bool(self.problem.contains_all_predecessors_mask(self._finished_mask(start_time), activity))
 
     def earliest_precedence_start(self, activity):
         max_finish_time_predecessors = 0
@@ -82,31 +102,27 @@ class Schedule(object):
                 min_finish_time_successors = self.start_times_activities[successor]
         return min_finish_time_successors - duration
 
-    def _finished_activities(self, time):
-        result = set()
-        keys = sorted(self.finish_times.keys())
-        for t in keys:
-            if t > time:
-                break
-            result.update(self.finish_times[t])
-        return result
+    def _finished_mask(self, time):
+        mask = np.zeros(self.problem.num_activities, dtype=bool)
+        for activity, finish_time in self.finish_times_activities.iteritems():
+            if finish_time <= time:
+                mask[activity] = True
+        return mask
+
+    def _scheduled_mask(self):
+        mask = np.zeros(self.problem.num_activities, dtype=bool)
+        mask[list(self.scheduled_activities)] = True
+        return mask
 
     @property
     def eligible_activities(self):
-        # improve
-        result = set()
-        for activity in xrange(self.problem.num_activities):
-            if activity not in self.scheduled_activities and self.problem.contains_all_predecessors(self.scheduled_activities, activity):
-                result.add(activity)
-        return result
+        scheduled = self._scheduled_mask()
+        candidates = np.flatnonzero(~scheduled)
+        return set(candidates[self.problem.contains_all_predecessors_mask(scheduled, candidates)].tolist())
 
     @property
     def makespan(self):
-        try:
-            makespan = max(self.finish_times.keys())
-        except ValueError:
-            makespan = 0
-        return makespan
+        return self._makespan
 
     def array_representation(self):
         arrays = []
@@ -152,6 +168,29 @@ class Schedule(object):
         self.plot(figsize=figsize)
         plt.savefig(file_name)
 
+    def _fitting_time(self, activity, times, direction):
+        # latest (right shift) or earliest (left shift) of sorted times where activity fits, one profile query
+        # skips all times up to the next fitting start instead of checking them one by one
+        demands = self.problem.demands(activity)
+        duration = self.problem.duration(activity)
+        low, high = 0, len(times) - 1
+        while low <= high:
+            if direction == self.RIGHT_SHIFT:
+                t = self.res_utilization.latest_start(demands, times[high], duration, times[low])
+                if t is None:
+                    return None
+                high = bisect.bisect_right(times, t, low, high + 1) - 1
+                if high >= low and times[high] == t:
+                    return t
+            else:
+                t = self.res_utilization.earliest_start(demands, times[low], duration, times[high])
+                if t is None:
+                    return None
+                low = bisect.bisect_left(times, t, low, high + 1)
+                if low <= high and times[low] == t:
+                    return t
+        return None
+
     def right_shift(self):
         activity_list = sorted(self.start_times.items(), reverse=True)
         for start_time, activities in activity_list:
@@ -159,14 +198,11 @@ class Schedule(object):
                 if activity == 0:
                     continue
                 self.remove(activity)
-                activity_starts = set(self.start_times.keys())
-                times = set(range(start_time, self.latest_precedence_start(activity) + 1))
-                times = times.intersection(activity_starts)
-                time_list = sorted(times, reverse=True)
-                for t in time_list:
-                    if self.can_place(activity, t, skip_check_precedence=True):
-                        self.add(activity, t, force=True)
-                        break
+                latest_start = self.latest_precedence_start(activity)
+                times = sorted(t for t in self.start_times if start_time <= t <= latest_start)
+                t = self._fitting_time(activity, times, self.RIGHT_SHIFT)
+                if t is not None:
+                    self.add(activity, t, force=True)
 
     def left_shift(self):
         activity_list = sorted(self.start_times.items())
@@ -175,14 +211,11 @@ class Schedule(object):
                 if activity == 0:
                     continue
                 self.remove(activity)
-                activity_starts = set(self.start_times.keys())
-                times = set(range(self.earliest_precedence_start(activity), start_time + 1))
-                times = times.intersection(activity_starts)
-                time_list = sorted(times)
-                for t in time_list:
-                    if self.can_place(activity, t, skip_check_precedence=True):
-                        self.add(activity, t, force=True)
-                        break
+                earliest_start = self.earliest_precedence_start(activity)
+                times = sorted(t for t in self.start_times if earliest_start <= t <= start_time)
+                t = self._fitting_time(activity, times, self.LEFT_SHIFT)
+                if t is not None:
+                    self.add(activity, t, force=True)
 
     def double_justification(self):
         makespan = self.makespan
@@ -211,3 +244,39 @@ class Schedule(object):
 
 
 
+
+
+class LazySchedule(object):
+    # start time array and makespan of decoded activity list, full Schedule is built on first use
+
+    __slots__ = ('problem', 'activity_list', 'start_times_array', 'makespan', '_schedule')
+
+    def __init__(self, problem, activity_list, start_times, makespan=None):
+        self.problem = problem
+        self.activity_list = np.asarray(activity_list, dtype=int)
+        self.start_times_array = np.asarray(start_times, dtype=int)
+        if makespan is None:
+            makespan = int((self.start_times_array + problem.durations).max())
+        self.makespan = makespan
+        self._schedule = None
+
+    @property
+    def schedule(self):
+        if self._schedule is None:
+            self._schedule = Schedule(self.problem)
+            for activity in self.activity_list:
+                self._schedule.add(activity, self.start_times_array[activity], force=True)
+        return self._schedule
+
+    def serialize(self):
+        return ActivityList(self.problem, np.lexsort((np.arange(self.problem.num_activities),
+                                                      self.start_times_array)))
+
+    def __getattr__(self, name):
+        # everything else is answered by the full schedule
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self.schedule, name)
+
+    def __str__(self):
+        return str(self.schedule)
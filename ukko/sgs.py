@@ -1,5 +1,10 @@
 # -*- coding: utf-8 -*-
 
+import bisect
+import heapq
+
+import numpy as np
+
 from schedule import Schedule
 
 
@@ -27,3 +32,191 @@ class SSGS(object):
                 real_start = t
                 break
         return real_start
+
+
+class FastSSGS(object):
+    # same start times as SSGS, but works on flat arrays and builds Schedule only on demand
+
+    def __init__(self, problem):
+        self.problem = problem
+        self.durations = problem.durations
+        self.demands = problem.res_demands
+        self.res_constraints = problem.res_constraints
+        # serial SGS never produces makespan longer than sum of all durations
+        self.horizon = int(self.durations.sum())
+        self._durations = self.durations.tolist()
+        self._predecessors = [predecessors.tolist() for predecessors in problem.predecessor_arrays]
+        self._demands = [problem.demands(activity) for activity in xrange(problem.num_activities)]
+        self._capacity = np.zeros((problem.num_resources, self.horizon + 1), dtype=int)
+
+    def decode(self, activity_list, bound=None, start_times=None):
+        # with bound decoding stops as soon as makespan of this decoding can not be shorter than bound, makespan
+        # is None then, justified schedule may still be shorter, start_times is optional row written in place
+        if start_times is None:
+            start_times = np.zeros(self.problem.num_activities, dtype=int)
+        # activity started after its latest start can not finish before bound
+        latest_starts = self.problem.latest_starts(bound - 1).tolist() if bound is not None else None
+        finish_times = [0] * self.problem.num_activities
+        self._capacity[:] = self.res_constraints
+        finishes = []  # sorted distinct finish times
+        for activity in activity_list:
+            precedence_feasible_start = 0
+            for predecessor in self._predecessors[activity]:
+                if finish_times[predecessor] > precedence_feasible_start:
+                    precedence_feasible_start = finish_times[predecessor]
+            real_start = self._compute_real_start(activity, precedence_feasible_start, finishes)
+            if latest_starts is not None and real_start > latest_starts[activity]:
+                return start_times, None
+            finish_time = real_start + self._durations[activity]
+            self._capacity[:, real_start:finish_time] -= self._demands[activity]
+            start_times[activity] = real_start
+            finish_times[activity] = finish_time
+            index = bisect.bisect_left(finishes, finish_time)
+            if index == len(finishes) or finishes[index] != finish_time:
+                finishes.insert(index, finish_time)
+        return start_times, finishes[-1]
+
+    def _compute_real_start(self, activity, precedence_feasible_start, finishes):
+        index = bisect.bisect_left(finishes, precedence_feasible_start)
+        duration = self._durations[activity]
+        demands = self._demands[activity]
+        while index < len(finishes):
+            t = finishes[index]
+            if duration == 0:
+                return t
+            blocked = np.flatnonzero(np.any(self._capacity[:, t:t + duration] < demands, axis=0))
+            if not len(blocked):
+                return t
+            # every candidate up to the last blocked period is blocked as well
+            index = bisect.bisect_right(finishes, t + blocked[-1], index + 1)
+        return 0
+
+    def get_schedule(self, activity_list):
+        start_times, makespan = self.decode(activity_list)
+        return self.build_schedule(activity_list, start_times)
+
+    def build_schedule(self, activity_list, start_times, schedule=None):
+        # given schedule is reset and filled instead of allocating new one
+        if schedule is None:
+            S = Schedule(self.problem)
+        else:
+            S = schedule
+            S.reset()
+        for activity in activity_list:
+            S.add(activity, start_times[activity], force=True)
+        return S
+
+
+class PSGS(FastSSGS):
+    # parallel (time incrementing) SGS, activity list only sets priority among activities eligible at the same time
+
+    def __init__(self, problem):
+        super(PSGS, self).__init__(problem)
+        self._successors = [successors.tolist() for successors in problem.successor_arrays]
+        self._num_predecessors = [len(predecessors) for predecessors in self._predecessors]
+        self._demand_lists = self.demands.T.tolist()
+
+    def decode(self, activity_list, bound=None, start_times=None):
+        num_activities = self.problem.num_activities
+        priorities = [0] * num_activities
+        for position, activity in enumerate(activity_list):
+            priorities[activity] = position
+        remaining = list(self._num_predecessors)
+        if start_times is None:
+            start_times = np.zeros(num_activities, dtype=int)
+        latest_starts = self.problem.latest_starts(bound - 1).tolist() if bound is not None else None
+        available = self.res_constraints[:, 0].tolist()
+        # eligible activities sorted by priority, active activities in heap by finish time
+        eligible = sorted((priorities[activity], activity)
+                          for activity in xrange(num_activities) if not remaining[activity])
+        active = []
+        t = 0
+        makespan = 0
+        while eligible or active:
+            if eligible:
+                eligible, late = self._start_eligible(eligible, priorities, available, active, start_times, t,
+                                                      latest_starts)
+                if late:
+                    return start_times, None
+            if not active:
+                break
+            t = active[0][0]
+            makespan = max(makespan, t)
+            # release every activity finished at t and its successors which become eligible
+            while active and active[0][0] == t:
+                activity = heapq.heappop(active)[1]
+                available[:] = [capacity + demand for demand, capacity in zip(self._demand_lists[activity], available)]
+                for successor in self._successors[activity]:
+                    remaining[successor] -= 1
+                    if not remaining[successor]:
+                        bisect.insort(eligible, (priorities[successor], successor))
+        return start_times, makespan
+
+    def _start_eligible(self, eligible, priorities, available, active, start_times, t, latest_starts=None):
+        candidates = [activity for priority, activity in eligible]
+        # available capacity only decreases during one time step, so whole batch is checked against it at once
+        fits = np.all(self.demands[:, candidates] <= np.array(available)[:, np.newaxis], axis=0).tolist()
+        waiting = []
+        # some activity started after its latest start, makespan can not get below the bound
+        late = False
+        for activity, fit in zip(candidates, fits):
+            demands = self._demand_lists[activity]
+            if fit and all(demand <= capacity for demand, capacity in zip(demands, available)):
+                available[:] = [capacity - demand for demand, capacity in zip(demands, available)]
+                start_times[activity] = t
+                heapq.heappush(active, (t + self._durations[activity], activity))
+                if latest_starts is not None and t > latest_starts[activity]:
+                    late = True
+            else:
+                waiting.append((priorities[activity], activity))
+        return waiting, late
+
+
+class BatchSSGS(object):
+    # decodes whole population matrix (one activity list per row) position by position across all rows
+
+    def __init__(self, problem):
+        self.problem = problem
+        self.durations = problem.durations
+        self.demands = problem.res_demands
+        self.res_constraints = problem.res_constraints
+        self.horizon = int(self.durations.sum())
+
+    def decode(self, population):
+        population = np.asarray(population, dtype=int)
+        size, num_activities = population.shape
+        rows = np.arange(size)
+        times = np.arange(self.horizon + 1)
+        start_times = np.zeros((size, num_activities), dtype=int)
+        finish_times = np.zeros((size, num_activities), dtype=int)
+        makespans = np.zeros(size, dtype=int)
+        capacity = np.empty((size, self.problem.num_resources, self.horizon + 1), dtype=int)
+        capacity[:] = self.res_constraints
+        is_finish = np.zeros((size, self.horizon + 1), dtype=bool)
+        for position in xrange(num_activities):
+            activities = population[:, position]
+            precedence_feasible_start = np.max(finish_times * self.problem.predecessor_mask[activities], axis=1)
+            durations = self.durations[activities]
+            demands = self.demands[:, activities].T[:, :, np.newaxis]
+            # candidate start times are finish times, so none of them is after the longest makespan
+            window = makespans.max() + 1
+            t = times[:window]
+            overload = np.any(capacity[:, :, :window] < demands, axis=1)
+            blocked = np.zeros((size, window + 1), dtype=int)
+            np.cumsum(overload, axis=1, out=blocked[:, 1:])
+            ends = np.minimum(t + durations[:, np.newaxis], window)
+            candidates = (is_finish[:, :window] &
+                          (t >= precedence_feasible_start[:, np.newaxis]) &
+                          (blocked[rows[:, np.newaxis], ends] == blocked[:, :window]))
+            # argmax gives the first candidate, or 0 when there is none as in SSGS
+            real_start = np.argmax(candidates, axis=1)
+            real_finish = real_start + durations
+            limit = real_finish.max()
+            t = times[:limit]
+            active = (t >= real_start[:, np.newaxis]) & (t < real_finish[:, np.newaxis])
+            capacity[:, :, :limit] -= demands * active[:, np.newaxis, :]
+            is_finish[rows, real_finish] = True
+            start_times[rows, activities] = real_start
+            finish_times[rows, activities] = real_finish
+            np.maximum(makespans, real_finish, out=makespans)
+        return start_times, makespans
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+
+import csv
+import json
+import time
+
+
+class _NullPhase(object):
+    def __enter__(self):
+        pass
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+NULL_PHASE = _NullPhase()
+
+
+class _Phase(object):
+    def __init__(self, stats, name):
+        self.stats = stats
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.time()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stats.record(self.name, time.time() - self.start)
+
+
+class Stats(object):
+    # collects per phase wall time and per generation progress of GARTH, subclass to hook in callbacks
+
+    def __init__(self):
+        self.start = time.time()
+        self.phase_times = {}
+        self.phase_calls = {}
+        self.generations = []
+        self._generation_times = {}
+
+    def phase(self, name):
+        return _Phase(self, name)
+
+    def record(self, name, duration):
+        self.phase_times[name] = self.phase_times.get(name, 0.0) + duration
+        self.phase_calls[name] = self.phase_calls.get(name, 0) + 1
+        self._generation_times[name] = self._generation_times.get(name, 0.0) + duration
+
+    def end_generation(self, garth):
+        record = {'generation': len(self.generations),
+                  'elapsed': time.time() - self.start,
+                  'generated_schedules': garth.generated_schedules,
+                  'best_makespan': int(garth.makespans[garth.indices[0]]),
+                  'cache_hits': garth.cache.hits if garth.cache is not None else 0,
+                  'cache_misses': garth.cache.misses if garth.cache is not None else 0}
+        for name, duration in self._generation_times.items():
+            record['time_' + name] = duration
+        self._generation_times = {}
+        self.generations.append(record)
+        return record
+
+    def summary(self):
+        return {'phases': dict((name, {'time': self.phase_times[name], 'calls': self.phase_calls[name]})
+                               for name in self.phase_times),
+                'generations': self.generations}
+
+    def to_json(self, file_path):
+        with open(file_path, 'w') as f:
+            json.dump(self.summary(), f, indent=2)
+
+    def to_csv(self, file_path):
+        columns = ['generation', 'elapsed', 'generated_schedules', 'best_makespan', 'cache_hits', 'cache_misses']
+        columns += sorted('time_' + name for name in self.phase_times)
+        with open(file_path, 'wb') as f:
+            writer = csv.DictWriter(f, columns, restval=0.0)
+            writer.writeheader()
+            writer.writerows(self.generations)
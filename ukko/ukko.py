@@ -4,12 +4,29 @@ import argparse
 from rcpparser import RCPParser
 from problem import Problem
 from garth import GARTH
+from island import IslandGARTH
+from stats import Stats
 
 
 def parse_args():
     parser = argparse.ArgumentParser(description='RCPSP Solver')
     parser.add_argument('rcp_file', help='RCP formated file with problem description')
-    return parser.parse_args()
+    parser.add_argument('--stats', default=None, help='Write per generation statistics to this JSON or CSV file')
+    parser.add_argument('--islands', type=int, default=1, help='Number of GARTH populations run in parallel processes')
+    parser.add_argument('--sgs', default='serial', choices=('serial', 'parallel', 'mixed'),
+                        help='Schedule generation scheme used for decoding activity lists')
+    parser.add_argument('--time-limit', type=float, default=None, help='Stop after this many seconds')
+    parser.add_argument('--target', type=int, default=None, help='Stop when makespan is not longer than this')
+    parser.add_argument('--stagnation', type=int, default=None,
+                        help='Stop after this many generations without improvement')
+    parser.add_argument('--checkpoint', default=None,
+                        help='Resume from this checkpoint file if it exists and save progress into it')
+    parser.add_argument('--verbose', action='store_true', help='Print best makespan after every generation')
+    args = parser.parse_args()
+    # islands run in separate processes, there is no single population to checkpoint or collect statistics of
+    if args.islands > 1 and (args.checkpoint or args.stats):
+        parser.error('--checkpoint and --stats can not be used with --islands')
+    return args
 
 
 def main():
@@ -17,8 +34,24 @@ def main():
     rcpparser = RCPParser()
     problem_dict = rcpparser(args.rcp_file)
     problem = Problem(problem_dict)
-    g = GARTH(problem)
-    g.run()
+    if args.islands > 1:
+        g = IslandGARTH(problem, islands=args.islands, sgs=args.sgs, time_limit=args.time_limit,
+                        target_makespan=args.target, stagnation=args.stagnation)
+    else:
+        g = GARTH(problem, stats=Stats() if args.stats else None, sgs=args.sgs, time_limit=args.time_limit,
+                  target_makespan=args.target, stagnation=args.stagnation, checkpoint=args.checkpoint)
+    if isinstance(g, GARTH):
+        for progress in g.iterate():
+            if args.verbose:
+                print '{generation}: {best_makespan}, gap {gap:.2%} ({generated_schedules} schedules, {elapsed:.2f} s)'.format(
+                    **progress)
+    else:
+        g.run()
+    if args.stats and isinstance(g, GARTH):
+        if args.stats.endswith('.csv'):
+            g.stats.to_csv(args.stats)
+        else:
+            g.stats.to_json(args.stats)
     print g.best.makespan
     print g.generated_schedules
 
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+
+import os.path
+
+from rcpparser import RCPParser
+from problem import Problem
+from garth import solve
+from cache import LRUCache
+
+
+class ProblemCache(LRUCache):
+    # bounded LRU cache of compiled problems, changed file gets new key by its modification time
+
+    def __init__(self, size=32):
+        super(ProblemCache, self).__init__(size)
+
+    @staticmethod
+    def key(filename):
+        return os.path.abspath(filename), os.path.getmtime(filename)
+
+    def get(self, filename):
+        key = self.key(filename)
+        problem = self._get(key)
+        if problem is None:
+            problem = Problem(RCPParser()(filename))
+            self._put(key, problem)
+        return problem
+
+
+def chunks(items, size):
+    return [items[i:i + size] for i in xrange(0, len(items), size)]
+
+
+def solve_runs(runs, cache, **params):
+    # runs is list of (filename, seed) pairs
+    results = []
+    for filename, seed in runs:
+        g, result = solve(cache.get(filename), seed, **params)
+        result.update({'filename': filename, 'schedule': str(g.best)})
+        results.append(result)
+    return results
+
+
+def run_key(filename, test_run_id):
+    return "test_run:{}:{}".format(os.path.basename(filename), test_run_id)
+
+
+def best_key(filename):
+    return "mybest:{}".format(os.path.basename(filename))
+
+
+def write_runs(client, results, test_run_id):
+    # all makespans of one chunk in one round trip
+    pipeline = client.pipeline(transaction=False)
+    for result in results:
+        pipeline.lpush(run_key(result['filename'], test_run_id), result['makespan'])
+    pipeline.execute()
+
+
+def write_best(client, results):
+    best = {}
+    for result in results:
+        if result['filename'] not in best or result['makespan'] < best[result['filename']]['makespan']:
+            best[result['filename']] = result
+    pipeline = client.pipeline(transaction=False)
+    for filename, result in best.items():
+        pipeline.hset(best_key(filename), 'makespan', result['makespan'])
+        pipeline.hset(best_key(filename), 'schedule', result['schedule'])
+    pipeline.execute()
+    return best